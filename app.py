@@ -8,7 +8,15 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
+
+# 数据加载与全部计算在 shoe_analytics 中，本文件只负责控件与图表
+from shoe_analytics import (NULL_DIAGNOSTICS, RADAR_DIMENSIONS, DatasetStore, Diagnostics, FilterState,
+                            RerunProfiler, ViewCache, analytics, config, open_dataset, open_views)
+
+DATA_PATH = 'data/marathon_shoe_data.json'
+
+# 局部片段：片段内控件变化时只重跑该函数（st.fragment 需 Streamlit 1.37+，1.33-1.36 为 experimental_fragment，更早版本退化为整页重跑）
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
 
 # ==================== 页面配置 ====================
 st.set_page_config(page_title="马拉松跑鞋品牌分析", page_icon="🏃", layout="wide", initial_sidebar_state="expanded")
@@ -23,120 +31,111 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ==================== 重跑剖析 ====================
+# SHOE_PROFILE_DIR 设置时剖析每次整页重跑，结果文件按侧边栏状态命名写入该目录
+profiler = None
+if config.PROFILE_DIR:
+    stale = st.session_state.pop('profiler', None)
+    if stale is not None:
+        # 上一次重跑被控件变化中断，丢弃其未完成的剖析
+        stale.abort()
+    profiler = RerunProfiler(config.PROFILE_DIR, config.PROFILER)
+    if profiler.start():
+        st.session_state['profiler'] = profiler
+
+# ==================== 运行诊断 ====================
+# SHOE_DIAGNOSTICS=1 时按会话累计各区块/图表耗时、重跑次数、缓存命中率与图表载荷大小，显示在侧边栏底部
+if config.DIAGNOSTICS:
+    diag = st.session_state.setdefault('diagnostics', Diagnostics())
+    diag.begin_rerun()
+else:
+    diag = NULL_DIAGNOSTICS
+
+def plot(fig):
+    # 输出 Plotly 图表（在 diag.chart 块内调用：开启诊断时计入该图表从构建到输出的耗时，并登记最近一次输出的图）
+    st.plotly_chart(fig, use_container_width=True)
+    diag.figure(fig)
+
 # ==================== 数据加载 ====================
-@st.cache_data
-def load_data():
-    with open('data/marathon_shoe_data.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    df = pd.DataFrame(data['records'])
-    df['share_pct'] = df['share'] * 100
-    df['year'] = df['year'].astype(int)
-    df['rank'] = df['rank'].astype(int)
-    df['type_zh'] = df['brand_type'].map({'domestic': '国产', 'international': '国际', 'other': '其他'})
-    return df, data['brands']
+if config.SHARED_DATASET:
+    # 共享只读数据集时开启写时复制：切片视图上的修改只会复制，不会触及共享数组
+    pd.set_option('mode.copy_on_write', True)
 
-df, brands_info = load_data()
+def open_current_dataset():
+    # 存在列式文件（python -m shoe_analytics convert 生成）时优先读取，否则回退到 JSON
+    # SHOE_COMPACT=1 时使用紧凑内存表示（分类列 + 小整型 + float32 份额）；SHOE_TENSOR=1 时另建稠密张量
+    dataset = open_dataset(DATA_PATH, compact=config.COMPACT, tensor=config.TENSOR)
+    if config.PRECOMPUTED:
+        # SHOE_PRECOMPUTED=1 时各派生表优先按筛选状态查预计算存储，存储缺失/过期或状态未覆盖时实时计算
+        dataset.precomputed = open_views(DATA_PATH)
+    return dataset.freeze() if config.SHARED_DATASET else dataset
 
-# ==================== 辅助函数 ====================
-def generate_dynamic_analysis(brand_data, brand_name):
-    """动态生成品牌分析文案"""
-    if len(brand_data) < 2:
-        return f"**{brand_name}**：数据不足，无法生成趋势分析。"
-    
-    yearly = brand_data.groupby('year').agg({'share_pct': 'mean', 'rank': 'mean'}).reset_index().sort_values('year')
-    start_share = yearly.iloc[0]['share_pct']
-    end_share = yearly.iloc[-1]['share_pct']
-    start_year = int(yearly.iloc[0]['year'])
-    end_year = int(yearly.iloc[-1]['year'])
-    
-    share_change = end_share - start_share
-    pct_change = (share_change / start_share * 100) if start_share > 0 else 0
-    
-    if share_change > 0:
-        direction = "上升"
-        icon = "📈"
-    elif share_change < 0:
-        direction = "下降"
-        icon = "📉"
-    else:
-        direction = "持平"
-        icon = "➡️"
-    
-    return f"{icon} **{brand_name}**：份额从 {start_share:.1f}%（{start_year}）→ {end_share:.1f}%（{end_year}），{direction}{abs(share_change):.1f}个百分点（{'+' if pct_change > 0 else ''}{pct_change:.1f}%）"
+@st.cache_resource
+def get_view_cache():
+    # 进程内所有会话共享；筛选结果与派生表只读，不可原地修改
+    return ViewCache(max_entries=config.FILTER_CACHE_ENTRIES, max_bytes=config.FILTER_CACHE_MB * 2 ** 20)
 
-def calculate_yearly_rank(data, aggregate=True):
-    """计算每年品牌排名"""
-    if aggregate:
-        yearly = data.groupby(['year', 'brand', 'type_zh'])['share'].mean().reset_index()
-    else:
-        yearly = data.groupby(['year', 'event', 'brand', 'type_zh'])['share'].mean().reset_index()
-    
-    def add_rank(group):
-        group = group.copy()
-        group['rank'] = group['share'].rank(ascending=False, method='min').astype(int)
-        return group
-    
-    if aggregate:
-        ranked = yearly.groupby('year').apply(add_rank).reset_index(drop=True)
-    else:
-        ranked = yearly.groupby(['year', 'event']).apply(add_rank).reset_index(drop=True)
-    
-    return ranked
+@st.cache_resource
+def get_dataset_store():
+    # 每个进程一个：数据文件内容指纹变化时后台加载新版本并原子替换，替换后清空旧版本的筛选结果缓存
+    view_cache = get_view_cache()
+    return DatasetStore(DATA_PATH, open_current_dataset, interval=config.RELOAD_INTERVAL,
+                        on_swap=lambda previous, current: view_cache.clear())
+
+# 本次重跑固定使用取到的版本，期间完成的热加载只影响之后的重跑；所有会话与缓存的筛选视图共用同一数据集，不为每次重跑拷贝
+# （SHOE_SHARED_DATASET=1 时数据集另设为只读）
+store = get_dataset_store()
+store_counts = (store.requests, store.loads)
+with diag.section("数据加载"):
+    dataset = store.current()
 
 # ==================== 侧边栏 ====================
-with st.sidebar:
+with diag.section("侧边栏"), st.sidebar:
     st.markdown("## 🏃 马拉松跑鞋分析")
     st.markdown("---")
     
     # 全局筛选器
     st.markdown("### 🎯 全局筛选")
     
-    all_events = sorted(df['event'].unique().tolist())
+    # 控件选项随数据集一次算好（或由编译产物直接提供）
+    options = dataset.options
+    all_events = list(options['events'])
     selected_events = st.multiselect("选择赛事", all_events, default=all_events)
     
-    min_year, max_year = int(df['year'].min()), int(df['year'].max())
+    min_year, max_year = options['years']
     year_range = st.slider("年份范围", min_year, max_year, (min_year, max_year))
     
-    cohort_filter = st.radio("跑者队列", ["破3选手", "全局跑者"], index=0)
+    cohort_filter = st.radio("跑者队列", list(options['cohorts']), index=0)
     
     aggregate_mode = st.checkbox("聚合所有赛事（取平均）", value=True)
     
     st.markdown("---")
     st.markdown(f"### 📅 数据范围\n- 赛事: {len(selected_events)} 场\n- 年份: {year_range[0]}-{year_range[1]}\n- 队列: {cohort_filter}")
 
-# 应用全局筛选
-filtered_df = df[
-    (df['event'].isin(selected_events)) &
-    (df['year'].between(year_range[0], year_range[1])) &
-    (df['cohort'] == cohort_filter)
-].copy()
+# 应用全局筛选（按分区索引拼接命中的切片）；筛选结果及排名等派生表按规范化的筛选状态缓存，各 Tab 共用
+view_cache = get_view_cache()
+lru_counts = (view_cache.lru.hits, view_cache.lru.misses)
+view = view_cache.view(dataset, FilterState.canonical(selected_events, year_range, cohort_filter))
+view_counts = (view.hits, view.misses)
+precomputed_counts = (dataset.precomputed.hits, dataset.precomputed.misses) if dataset.precomputed is not None else None
 
 # ==================== 主页面 - Tab布局 ====================
 st.markdown('<p class="main-header">🏃 马拉松跑鞋品牌数据分析平台</p>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">深度分析乔丹品牌及国产/国际品牌在马拉松赛场上的地位变化</p>', unsafe_allow_html=True)
 
-tab1, tab2, tab3, tab4 = st.tabs(["📊 总览排行", "👟 乔丹专题", "⚖️ 品牌对比", "🌏 国产vs国际"])
-
 # ==================== Tab1: 总览排行 ====================
-with tab1:
+@diag.timed("总览排行")
+def render_overview():
+    """Tab1: 总览排行"""
     st.markdown("### 📊 品牌排行榜")
     
-    # 最新年份排行
+    # 最新年份排行（各品牌在所选赛事上的平均份额，取自聚合立方体）
     latest_year = year_range[1]
-    latest_data = filtered_df[filtered_df['year'] == latest_year]
+    ranking = analytics.top_ranking(view, latest_year)
     
-    if len(latest_data) == 0:
+    if len(ranking) == 0:
         st.warning("所选条件下暂无数据")
     else:
-        if aggregate_mode:
-            ranking = latest_data.groupby(['brand', 'type_zh'])['share_pct'].mean().reset_index()
-        else:
-            ranking = latest_data.groupby(['brand', 'type_zh'])['share_pct'].mean().reset_index()
-        
-        ranking = ranking.sort_values('share_pct', ascending=False).head(20).reset_index(drop=True)
-        ranking['排名'] = range(1, len(ranking) + 1)
-        ranking['份额(%)'] = ranking['share_pct'].round(1)
-        
         col1, col2 = st.columns([1, 1.5])
         
         with col1:
@@ -147,210 +146,194 @@ with tab1:
         
         with col2:
             st.markdown(f"#### {latest_year}年 份额分布")
-            fig = px.bar(ranking.head(15), x='share_pct', y='brand', orientation='h',
-                        color='type_zh', color_discrete_map={'国产': '#EF4444', '国际': '#3B82F6', '其他': '#9CA3AF'})
-            fig.update_layout(height=500, yaxis=dict(autorange='reversed', title=''), xaxis=dict(title='份额 (%)'),
-                            legend=dict(orientation="h", yanchor="bottom", y=1.02))
-            st.plotly_chart(fig, use_container_width=True)
+            with diag.chart("总览/份额分布"):
+                fig = px.bar(ranking.head(15), x='share_pct', y='brand', orientation='h',
+                            color='type_zh', color_discrete_map={'国产': '#EF4444', '国际': '#3B82F6', '其他': '#9CA3AF'})
+                fig.update_layout(height=500, yaxis=dict(autorange='reversed', title=''), xaxis=dict(title='份额 (%)'),
+                                legend=dict(orientation="h", yanchor="bottom", y=1.02))
+                plot(fig)
         
         # 核心指标卡片
         st.markdown("---")
         st.markdown("### 💡 关键洞察")
         
         c1, c2, c3, c4 = st.columns(4)
+        insights = analytics.overview_insights(ranking, brand='乔丹', leader='特步')
         
         # 乔丹排名
-        jordan_rank = ranking[ranking['brand'] == '乔丹']['排名'].values
-        jordan_share = ranking[ranking['brand'] == '乔丹']['份额(%)'].values
-        
         with c1:
-            if len(jordan_rank) > 0:
-                st.metric(f"🏅 乔丹排名({latest_year})", f"第{int(jordan_rank[0])}名", f"份额 {jordan_share[0]}%")
+            if insights['brand_rank'] is not None:
+                st.metric(f"🏅 乔丹排名({latest_year})", f"第{int(insights['brand_rank'])}名", f"份额 {insights['brand_share']}%")
             else:
                 st.metric(f"🏅 乔丹排名({latest_year})", "未进TOP20")
         
         # 特步数据
-        xtep_data = ranking[ranking['brand'] == '特步']
         with c2:
-            if len(xtep_data) > 0:
-                st.metric("👑 特步份额", f"{xtep_data['份额(%)'].values[0]}%", "领跑市场")
+            if insights['leader_share'] is not None:
+                st.metric("👑 特步份额", f"{insights['leader_share']}%", "领跑市场")
         
         # 国产占比
-        domestic_share = ranking[ranking['type_zh'] == '国产']['份额(%)'].sum()
         with c3:
-            st.metric("🇨🇳 国产品牌占比", f"{domestic_share:.1f}%")
+            st.metric("🇨🇳 国产品牌占比", f"{insights['domestic_share']:.1f}%")
         
         # TOP10国产数量
-        top10_domestic = len(ranking.head(10)[ranking.head(10)['type_zh'] == '国产'])
         with c4:
-            st.metric("🏆 TOP10国产品牌数", f"{top10_domestic} 个")
+            st.metric("🏆 TOP10国产品牌数", f"{insights['top10_domestic']} 个")
 
-# ==================== Tab2: 乔丹专题 ====================
-with tab2:
-    st.markdown("### 👟 乔丹品牌深度分析")
+# ==================== Tab2: 品牌专题 ====================
+@fragment
+@diag.timed("品牌专题 · 趋势片段")
+def render_brand_trend(brand):
+    """品牌份额/排名趋势（局部片段：切换查看模式只重跑本区域）"""
+    view_mode = st.radio("查看模式", ["份额趋势", "排名趋势"], horizontal=True)
     
-    jordan_data = filtered_df[filtered_df['brand'] == '乔丹'].copy()
+    if view_mode == "份额趋势":
+        st.markdown("#### 📈 份额变化趋势")
+        trend = analytics.brand_share_trend(view, brand, aggregate_mode)
     
-    if len(jordan_data) == 0:
-        st.warning("所选条件下暂无乔丹品牌数据")
-    else:
-        # 核心指标
-        c1, c2, c3, c4 = st.columns(4)
-        with c1:
-            best = jordan_data.loc[jordan_data['rank'].idxmin()]
-            st.metric("🏆 历史最佳排名", f"第{int(best['rank'])}名", f"{best['event']} {int(best['year'])}")
-        with c2:
-            worst = jordan_data.loc[jordan_data['rank'].idxmax()]
-            st.metric("📉 历史最差排名", f"第{int(worst['rank'])}名", f"{worst['event']} {int(worst['year'])}")
-        with c3:
-            st.metric("📈 平均排名", f"第{jordan_data['rank'].mean():.1f}名")
-        with c4:
-            st.metric("📊 平均份额", f"{jordan_data['share_pct'].mean():.1f}%")
-        
-        st.markdown("---")
-        
-        # 查看模式切换
-        view_mode = st.radio("查看模式", ["份额趋势", "排名趋势"], horizontal=True)
-        
-        col_l, col_r = st.columns(2)
-        
-        with col_l:
-            if view_mode == "份额趋势":
-                st.markdown("#### 📈 份额变化趋势")
-                if aggregate_mode:
-                    trend = jordan_data.groupby('year')['share_pct'].mean().reset_index()
-                else:
-                    trend = jordan_data.groupby(['year', 'event'])['share_pct'].mean().reset_index()
-                
-                if aggregate_mode:
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(x=trend['year'], y=trend['share_pct'], mode='lines+markers',
-                                            name='乔丹', line=dict(color='#EF4444', width=3), marker=dict(size=10)))
-                else:
-                    fig = go.Figure()
-                    for event in trend['event'].unique():
-                        event_data = trend[trend['event'] == event]
-                        fig.add_trace(go.Scatter(x=event_data['year'], y=event_data['share_pct'],
-                                                mode='lines+markers', name=event))
-                
-                fig.update_layout(height=400, yaxis=dict(title='份额 (%)'), xaxis=dict(title='年份', dtick=1))
-                st.plotly_chart(fig, use_container_width=True)
-            
-            else:  # 排名趋势
-                st.markdown("#### 📊 排名变化趋势")
-                ranked_data = calculate_yearly_rank(filtered_df, aggregate_mode)
-                jordan_rank = ranked_data[ranked_data['brand'] == '乔丹']
-                
-                if aggregate_mode:
-                    rank_trend = jordan_rank.groupby('year')['rank'].mean().reset_index()
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(x=rank_trend['year'], y=rank_trend['rank'], mode='lines+markers',
-                                            name='乔丹', line=dict(color='#EF4444', width=3), marker=dict(size=10)))
-                else:
-                    fig = go.Figure()
-                    for event in jordan_rank['event'].unique():
-                        event_data = jordan_rank[jordan_rank['event'] == event]
-                        fig.add_trace(go.Scatter(x=event_data['year'], y=event_data['rank'],
-                                                mode='lines+markers', name=event))
-                
-                fig.update_layout(height=400, yaxis=dict(autorange='reversed', title='排名（越小越好）'),
-                                xaxis=dict(title='年份', dtick=1))
-                st.plotly_chart(fig, use_container_width=True)
-        
-        with col_r:
-            st.markdown("#### 🗺️ 各赛事表现热力图")
-            heatmap_data = jordan_data.pivot_table(values='rank', index='event', columns='year', aggfunc='mean')
-            if len(heatmap_data) > 0:
+        with diag.chart("品牌专题/份额趋势"):
+            if aggregate_mode:
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=trend['year'], y=trend['share_pct'], mode='lines+markers',
+                                        name=brand, line=dict(color='#EF4444', width=3), marker=dict(size=10)))
+            else:
+                fig = go.Figure()
+                for event in trend['event'].unique():
+                    event_data = trend[trend['event'] == event]
+                    fig.add_trace(go.Scatter(x=event_data['year'], y=event_data['share_pct'],
+                                            mode='lines+markers', name=event))
+    
+            fig.update_layout(height=400, yaxis=dict(title='份额 (%)'), xaxis=dict(title='年份', dtick=1))
+            plot(fig)
+    
+    else:  # 排名趋势
+        st.markdown("#### 📊 排名变化趋势")
+        brand_rank = analytics.brand_rank_series(view, brand, aggregate_mode)
+    
+        with diag.chart("品牌专题/排名趋势"):
+            if aggregate_mode:
+                rank_trend = brand_rank
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=rank_trend['year'], y=rank_trend['rank'], mode='lines+markers',
+                                        name=brand, line=dict(color='#EF4444', width=3), marker=dict(size=10)))
+            else:
+                fig = go.Figure()
+                for event in brand_rank['event'].unique():
+                    event_data = brand_rank[brand_rank['event'] == event]
+                    fig.add_trace(go.Scatter(x=event_data['year'], y=event_data['rank'],
+                                            mode='lines+markers', name=event))
+    
+            fig.update_layout(height=400, yaxis=dict(autorange='reversed', title='排名（越小越好）'),
+                            xaxis=dict(title='年份', dtick=1))
+            plot(fig)
+
+@diag.timed("品牌专题")
+def render_brand():
+    """Tab2: 品牌专题（所有指标查各筛选状态下全部品牌的专题表，切换品牌不重新扫描数据）"""
+    brands = analytics.brand_choices(view)
+    if not brands:
+        st.markdown("### 👟 品牌深度分析")
+        st.warning("所选条件下暂无品牌数据")
+        return
+    # 已选品牌在新的筛选范围内无数据时回到默认品牌
+    if st.session_state.get('profile_brand') not in brands:
+        st.session_state.pop('profile_brand', None)
+    brand = st.selectbox("选择品牌", brands, index=brands.index('乔丹') if '乔丹' in brands else 0, key='profile_brand')
+    
+    st.markdown(f"### 👟 {brand}品牌深度分析")
+    
+    profile = analytics.brand_profile(view, brand)
+    
+    # 核心指标
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        st.metric("🏆 历史最佳排名", f"第{int(profile['best_rank'])}名", f"{profile['best_event']} {int(profile['best_year'])}")
+    with c2:
+        st.metric("📉 历史最差排名", f"第{int(profile['worst_rank'])}名", f"{profile['worst_event']} {int(profile['worst_year'])}")
+    with c3:
+        st.metric("📈 平均排名", f"第{profile['rank_mean']:.1f}名")
+    with c4:
+        st.metric("📊 平均份额", f"{profile['share_pct_mean']:.1f}%")
+    
+    st.markdown("---")
+    
+    col_l, col_r = st.columns(2)
+    
+    with col_l:
+        render_brand_trend(brand)
+    
+    with col_r:
+        st.markdown("#### 🗺️ 各赛事表现热力图")
+        heatmap_data = view.heatmap(brand)
+        if len(heatmap_data) > 0:
+            with diag.chart("品牌专题/热力图"):
                 fig = px.imshow(heatmap_data, labels=dict(x="年份", y="赛事", color="排名"),
                                color_continuous_scale='RdYlGn_r', aspect="auto")
                 fig.update_layout(height=400)
-                st.plotly_chart(fig, use_container_width=True)
-        
-        # 动态分析报告
-        st.markdown("---")
-        st.markdown("### 🤖 智能分析报告")
-        
-        analysis_text = generate_dynamic_analysis(jordan_data, '乔丹')
+                plot(fig)
+    
+    # 动态分析报告
+    st.markdown("---")
+    st.markdown("### 🤖 智能分析报告")
+    
+    analysis_text, rank_change = analytics.brand_report(view, brand, profile)
+    if rank_change is not None:
+        tone, trend_text = rank_change
+        box_class = f"{tone}-box"
+        # 市场定位为人工撰写的文案，目前只有乔丹
+        positioning = ""
+        if brand == '乔丹':
+            positioning = f"""<br><br>
+        <strong>市场定位：</strong>{"乔丹在全局跑者中保持较稳定的大众化地位，但在破3精英选手中的渗透率持续下滑，表明其在高端竞技领域的竞争力正被其他国产品牌蚕食。" if cohort_filter == "破3选手" else "乔丹在全局跑者市场中保持稳定份额，品牌认知度较高，但面临来自特步等头部国产品牌的激烈竞争。"}"""
         
-        # 计算更详细的分析
-        yearly_jordan = jordan_data.groupby('year').agg({'share_pct': 'mean', 'rank': 'mean'}).reset_index().sort_values('year')
-        if len(yearly_jordan) >= 2:
-            start_rank = yearly_jordan.iloc[0]['rank']
-            end_rank = yearly_jordan.iloc[-1]['rank']
-            rank_change = end_rank - start_rank
-            
-            if rank_change > 0:
-                box_class = "warning-box"
-                trend_text = f"排名从第{start_rank:.0f}名下滑至第{end_rank:.0f}名，下降了{rank_change:.0f}个位次"
-            elif rank_change < 0:
-                box_class = "success-box"
-                trend_text = f"排名从第{start_rank:.0f}名上升至第{end_rank:.0f}名，提升了{abs(rank_change):.0f}个位次"
-            else:
-                box_class = "insight-box"
-                trend_text = f"排名保持在第{end_rank:.0f}名左右，相对稳定"
-            
-            st.markdown(f"""
-            <div class="{box_class}">
-            <strong>📊 乔丹品牌趋势分析</strong><br><br>
-            {analysis_text}<br><br>
-            <strong>排名变化：</strong>{trend_text}<br><br>
-            <strong>市场定位：</strong>{"乔丹在全局跑者中保持较稳定的大众化地位，但在破3精英选手中的渗透率持续下滑，表明其在高端竞技领域的竞争力正被其他国产品牌蚕食。" if cohort_filter == "破3选手" else "乔丹在全局跑者市场中保持稳定份额，品牌认知度较高，但面临来自特步等头部国产品牌的激烈竞争。"}
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(f"""
+        <div class="{box_class}">
+        <strong>📊 {brand}品牌趋势分析</strong><br><br>
+        {analysis_text}<br><br>
+        <strong>排名变化：</strong>{trend_text}{positioning}
+        </div>
+        """, unsafe_allow_html=True)
 
 # ==================== Tab3: 品牌对比 ====================
-with tab3:
-    st.markdown("### ⚖️ 自由品牌对比分析")
-    
-    # 获取TOP品牌作为默认选项
-    top_brands = filtered_df.groupby('brand')['share_pct'].mean().sort_values(ascending=False).head(10).index.tolist()
-    default_brands = ['乔丹'] + [b for b in top_brands if b != '乔丹'][:4]
-    
-    all_brands = sorted(filtered_df['brand'].unique().tolist())
+@fragment
+@diag.timed("品牌对比 · 对比片段")
+def render_brand_comparison(all_brands, default_brands):
+    """所选品牌的对比图表与总结（局部片段：调整品牌选择只重跑本区域）"""
     selected_brands = st.multiselect("选择要对比的品牌（可多选）", all_brands, default=default_brands)
     
     if len(selected_brands) < 2:
         st.warning("请至少选择2个品牌进行对比")
     else:
-        compare_df = filtered_df[filtered_df['brand'].isin(selected_brands)]
-        
         col_l, col_r = st.columns(2)
         
         with col_l:
             st.markdown("#### 📈 份额趋势对比")
-            if aggregate_mode:
-                trend = compare_df.groupby(['year', 'brand'])['share_pct'].mean().reset_index()
-            else:
-                trend = compare_df.groupby(['year', 'brand'])['share_pct'].mean().reset_index()
+            trend = view.brand_year_means()
             
-            fig = go.Figure()
-            for brand in selected_brands:
-                brand_trend = trend[trend['brand'] == brand]
-                if len(brand_trend) > 0:
-                    fig.add_trace(go.Scatter(x=brand_trend['year'], y=brand_trend['share_pct'],
-                                            mode='lines+markers', name=brand))
-            fig.update_layout(height=400, yaxis=dict(title='份额 (%)'), xaxis=dict(title='年份', dtick=1))
-            st.plotly_chart(fig, use_container_width=True)
+            with diag.chart("对比/份额趋势"):
+                fig = go.Figure()
+                for brand in selected_brands:
+                    brand_trend = trend[trend['brand'] == brand]
+                    if len(brand_trend) > 0:
+                        fig.add_trace(go.Scatter(x=brand_trend['year'], y=brand_trend['share_pct'],
+                                                mode='lines+markers', name=brand))
+                fig.update_layout(height=400, yaxis=dict(title='份额 (%)'), xaxis=dict(title='年份', dtick=1))
+                plot(fig)
         
         with col_r:
             st.markdown("#### 📊 排名趋势对比")
-            ranked = calculate_yearly_rank(filtered_df, aggregate_mode)
-            ranked_compare = ranked[ranked['brand'].isin(selected_brands)]
-            
-            if aggregate_mode:
-                rank_trend = ranked_compare.groupby(['year', 'brand'])['rank'].mean().reset_index()
-            else:
-                rank_trend = ranked_compare.groupby(['year', 'brand'])['rank'].mean().reset_index()
+            rank_trend = analytics.compare_rank_trend(view, selected_brands, aggregate_mode)
             
-            fig = go.Figure()
-            for brand in selected_brands:
-                brand_rank = rank_trend[rank_trend['brand'] == brand]
-                if len(brand_rank) > 0:
-                    fig.add_trace(go.Scatter(x=brand_rank['year'], y=brand_rank['rank'],
-                                            mode='lines+markers', name=brand))
-            fig.update_layout(height=400, yaxis=dict(autorange='reversed', title='排名（越小越好）'),
-                            xaxis=dict(title='年份', dtick=1))
-            st.plotly_chart(fig, use_container_width=True)
+            with diag.chart("对比/排名趋势"):
+                fig = go.Figure()
+                for brand in selected_brands:
+                    brand_rank = rank_trend[rank_trend['brand'] == brand]
+                    if len(brand_rank) > 0:
+                        fig.add_trace(go.Scatter(x=brand_rank['year'], y=brand_rank['rank'],
+                                                mode='lines+markers', name=brand))
+                fig.update_layout(height=400, yaxis=dict(autorange='reversed', title='排名（越小越好）'),
+                                xaxis=dict(title='年份', dtick=1))
+                plot(fig)
         
         # 雷达图
         st.markdown("---")
@@ -367,44 +350,29 @@ with tab3:
             | **赛事覆盖** | 参与赛事数/总赛事数×100 | 参与的赛事越多，得分越高 |
             """)
         
-        radar_data = []
-        for brand in selected_brands:
-            bd = compare_df[compare_df['brand'] == brand]
-            if len(bd) == 0:
-                continue
-            radar_data.append({
-                'brand': brand,
-                '排名得分': max(0, min(100, 100 - bd['rank'].mean() * 5)),
-                '份额得分': min(100, bd['share_pct'].mean() * 5),
-                '最佳表现': max(0, min(100, 100 - bd['rank'].min() * 8)),
-                '稳定性': max(0, min(100, 100 - bd['rank'].std() * 5)),
-                '赛事覆盖': bd['event'].nunique() / df['event'].nunique() * 100
-            })
+        radar_data = view.radar_metrics(selected_brands).to_dict('records')
         
         if radar_data:
-            cats = ['排名得分', '份额得分', '最佳表现', '稳定性', '赛事覆盖']
-            fig = go.Figure()
-            for r in radar_data:
-                fig.add_trace(go.Scatterpolar(r=[r[c] for c in cats], theta=cats, fill='toself', name=r['brand']))
-            fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])), height=450)
-            st.plotly_chart(fig, use_container_width=True)
+            with diag.chart("对比/雷达图"):
+                cats = RADAR_DIMENSIONS
+                fig = go.Figure()
+                for r in radar_data:
+                    fig.add_trace(go.Scatterpolar(r=[r[c] for c in cats], theta=cats, fill='toself', name=r['brand']))
+                fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])), height=450)
+                plot(fig)
         
         # 动态分析报告
         st.markdown("---")
         st.markdown("#### 🤖 自动分析总结")
         
-        analysis_lines = []
-        for brand in selected_brands:
-            brand_data = compare_df[compare_df['brand'] == brand]
-            analysis_lines.append(generate_dynamic_analysis(brand_data, brand))
+        analysis_lines = analytics.brand_narratives(view, selected_brands)
         
         st.markdown("\n\n".join(analysis_lines))
         
         # 对比结论
-        if len(radar_data) >= 2:
-            sorted_by_rank = sorted(radar_data, key=lambda x: x['排名得分'], reverse=True)
-            best = sorted_by_rank[0]
-            worst = sorted_by_rank[-1]
+        conclusion = analytics.compare_conclusion(radar_data)
+        if conclusion is not None:
+            best, worst = conclusion
             
             st.markdown(f"""
             <div class="insight-box">
@@ -414,25 +382,27 @@ with tab3:
             </div>
             """, unsafe_allow_html=True)
 
+@diag.timed("品牌对比")
+def render_compare():
+    """Tab3: 品牌对比"""
+    st.markdown("### ⚖️ 自由品牌对比分析")
+    
+    # 获取TOP品牌作为默认选项
+    all_brands, default_brands = analytics.compare_candidates(view, anchor='乔丹')
+    render_brand_comparison(all_brands, default_brands)
+
 # ==================== Tab4: 国产vs国际 ====================
-with tab4:
+@diag.timed("国产vs国际")
+def render_domestic():
+    """Tab4: 国产vs国际"""
     st.markdown("### 🌏 国产品牌 vs 国际品牌")
     
     # 核心指标
-    if aggregate_mode:
-        type_trend = filtered_df.groupby(['year', 'brand_type', 'type_zh'])['share'].sum().reset_index()
-    else:
-        type_trend = filtered_df.groupby(['year', 'brand_type', 'type_zh'])['share'].sum().reset_index()
-    
-    type_trend['share_pct'] = type_trend['share'] * 100
-    type_trend = type_trend[type_trend['brand_type'].isin(['domestic', 'international'])]
+    summary = analytics.domestic_summary(view)
     
-    if len(type_trend) > 0:
-        min_yr = type_trend['year'].min()
-        max_yr = type_trend['year'].max()
-        
-        dom_first = type_trend[(type_trend['year'] == min_yr) & (type_trend['brand_type'] == 'domestic')]['share_pct'].sum()
-        dom_last = type_trend[(type_trend['year'] == max_yr) & (type_trend['brand_type'] == 'domestic')]['share_pct'].sum()
+    if summary is not None:
+        min_yr, max_yr = summary['min_year'], summary['max_year']
+        dom_first, dom_last, change = summary['first'], summary['last'], summary['change']
         
         c1, c2, c3, c4 = st.columns(4)
         with c1:
@@ -440,42 +410,41 @@ with tab4:
         with c2:
             st.metric(f"🇨🇳 国产占比({max_yr})", f"{dom_last:.1f}%")
         with c3:
-            change = dom_last - dom_first
             st.metric("📈 国产增长", f"{change:+.1f}%")
         with c4:
-            top10_dom = filtered_df[(filtered_df['rank'] <= 10) & (filtered_df['brand_type'] == 'domestic')]
-            if len(top10_dom) > 0:
-                st.metric("🏅 TOP10国产数(均)", f"{top10_dom.groupby('year').size().mean():.1f}个")
+            if summary['top10_mean'] is not None:
+                st.metric("🏅 TOP10国产数(均)", f"{summary['top10_mean']:.1f}个")
         
         st.markdown("---")
         col_l, col_r = st.columns(2)
         
         with col_l:
             st.markdown("#### 📊 市场份额趋势")
-            yearly_type = type_trend.groupby(['year', 'type_zh'])['share_pct'].sum().reset_index()
+            yearly_type = analytics.type_share_trend(view)
             
-            fig = go.Figure()
-            for type_zh in ['国产', '国际']:
-                td = yearly_type[yearly_type['type_zh'] == type_zh]
-                color = '#EF4444' if type_zh == '国产' else '#3B82F6'
-                fig.add_trace(go.Scatter(x=td['year'], y=td['share_pct'], mode='lines', fill='tozeroy',
-                                        name=type_zh, line=dict(color=color)))
-            fig.update_layout(height=400, yaxis=dict(title='份额 (%)'), xaxis=dict(title='年份', dtick=1))
-            st.plotly_chart(fig, use_container_width=True)
+            with diag.chart("国产vs国际/份额趋势"):
+                fig = go.Figure()
+                for type_zh in ['国产', '国际']:
+                    td = yearly_type[yearly_type['type_zh'] == type_zh]
+                    color = '#EF4444' if type_zh == '国产' else '#3B82F6'
+                    fig.add_trace(go.Scatter(x=td['year'], y=td['share_pct'], mode='lines', fill='tozeroy',
+                                            name=type_zh, line=dict(color=color)))
+                fig.update_layout(height=400, yaxis=dict(title='份额 (%)'), xaxis=dict(title='年份', dtick=1))
+                plot(fig)
         
         with col_r:
             st.markdown("#### 📈 TOP10品牌数量变化")
-            top10_by_type = filtered_df[filtered_df['rank'] <= 10].groupby(['year', 'type_zh']).size().reset_index(name='count')
-            top10_by_type = top10_by_type[top10_by_type['type_zh'].isin(['国产', '国际'])]
+            top10_by_type = view.top10_by_type()
             
             if len(top10_by_type) > 0:
-                fig = go.Figure()
-                for type_zh in ['国产', '国际']:
-                    td = top10_by_type[top10_by_type['type_zh'] == type_zh]
-                    color = '#EF4444' if type_zh == '国产' else '#3B82F6'
-                    fig.add_trace(go.Bar(x=td['year'], y=td['count'], name=type_zh, marker_color=color))
-                fig.update_layout(height=400, barmode='group', yaxis=dict(title='品牌数量'), xaxis=dict(title='年份', dtick=1))
-                st.plotly_chart(fig, use_container_width=True)
+                with diag.chart("国产vs国际/TOP10"):
+                    fig = go.Figure()
+                    for type_zh in ['国产', '国际']:
+                        td = top10_by_type[top10_by_type['type_zh'] == type_zh]
+                        color = '#EF4444' if type_zh == '国产' else '#3B82F6'
+                        fig.add_trace(go.Bar(x=td['year'], y=td['count'], name=type_zh, marker_color=color))
+                    fig.update_layout(height=400, barmode='group', yaxis=dict(title='品牌数量'), xaxis=dict(title='年份', dtick=1))
+                    plot(fig)
         
         # 代表品牌趋势
         st.markdown("---")
@@ -484,37 +453,39 @@ with tab4:
         cl, cr = st.columns(2)
         with cl:
             st.markdown("##### 国产品牌TOP5")
-            dom_brands = ['特步', '李宁', '安踏', '鸿星尔克', '乔丹']
-            dom_trend = filtered_df[filtered_df['brand'].isin(dom_brands)].groupby(['year', 'brand'])['rank'].mean().reset_index()
+            dom_brands = analytics.DOMESTIC_LEADERS
+            dom_trend = view.brand_rank_trend(dom_brands)
             
             if len(dom_trend) > 0:
-                fig = go.Figure()
-                for b in dom_brands:
-                    bd = dom_trend[dom_trend['brand'] == b]
-                    if len(bd) > 0:
-                        fig.add_trace(go.Scatter(x=bd['year'], y=bd['rank'], mode='lines+markers', name=b))
-                fig.update_layout(height=350, yaxis=dict(autorange='reversed', title='排名'), xaxis=dict(title='年份', dtick=1))
-                st.plotly_chart(fig, use_container_width=True)
+                with diag.chart("国产vs国际/国产代表品牌"):
+                    fig = go.Figure()
+                    for b in dom_brands:
+                        bd = dom_trend[dom_trend['brand'] == b]
+                        if len(bd) > 0:
+                            fig.add_trace(go.Scatter(x=bd['year'], y=bd['rank'], mode='lines+markers', name=b))
+                    fig.update_layout(height=350, yaxis=dict(autorange='reversed', title='排名'), xaxis=dict(title='年份', dtick=1))
+                    plot(fig)
         
         with cr:
             st.markdown("##### 国际品牌TOP5")
-            int_brands = ['Nike', 'Adidas', 'ASICS', 'Saucony', 'HOKA']
-            int_trend = filtered_df[filtered_df['brand'].isin(int_brands)].groupby(['year', 'brand'])['rank'].mean().reset_index()
+            int_brands = analytics.INTERNATIONAL_LEADERS
+            int_trend = view.brand_rank_trend(int_brands)
             
             if len(int_trend) > 0:
-                fig = go.Figure()
-                for b in int_brands:
-                    bd = int_trend[int_trend['brand'] == b]
-                    if len(bd) > 0:
-                        fig.add_trace(go.Scatter(x=bd['year'], y=bd['rank'], mode='lines+markers', name=b))
-                fig.update_layout(height=350, yaxis=dict(autorange='reversed', title='排名'), xaxis=dict(title='年份', dtick=1))
-                st.plotly_chart(fig, use_container_width=True)
+                with diag.chart("国产vs国际/国际代表品牌"):
+                    fig = go.Figure()
+                    for b in int_brands:
+                        bd = int_trend[int_trend['brand'] == b]
+                        if len(bd) > 0:
+                            fig.add_trace(go.Scatter(x=bd['year'], y=bd['rank'], mode='lines+markers', name=b))
+                    fig.update_layout(height=350, yaxis=dict(autorange='reversed', title='排名'), xaxis=dict(title='年份', dtick=1))
+                    plot(fig)
         
         # 智能分析
         st.markdown("---")
         st.markdown("#### 🤖 智能分析报告")
         
-        growth_rate = (dom_last - dom_first) / dom_first * 100 if dom_first > 0 else 0
+        growth_rate = summary['growth_rate']
         
         st.markdown(f"""
         <div class="success-box">
@@ -529,6 +500,48 @@ with tab4:
         </div>
         """, unsafe_allow_html=True)
 
+# ==================== 页面导航 ====================
+PAGES = {
+    "📊 总览排行": render_overview,
+    "👟 品牌专题": render_brand,
+    "⚖️ 品牌对比": render_compare,
+    "🌏 国产vs国际": render_domestic,
+}
+
+if config.LAZY_TABS:
+    # 懒加载导航：只计算并渲染当前页面，其余页面切换时才执行
+    page = st.radio("页面", list(PAGES), horizontal=True, label_visibility="collapsed", key="page")
+    PAGES[page]()
+else:
+    for tab, render in zip(st.tabs(list(PAGES)), PAGES.values()):
+        with tab:
+            render()
+
 # ==================== 页脚 ====================
 st.markdown("---")
 st.markdown('<div style="text-align:center;color:#64748B;padding:1rem;">📊 马拉松跑鞋品牌分析平台 v2.0 | 数据来源：悦跑圈等平台</div>', unsafe_allow_html=True)
+
+# ==================== 运行诊断面板 ====================
+if config.DIAGNOSTICS:
+    # 进程级计数器按本次重跑的增量计入会话
+    diag.count("数据集版本", store.requests - store.loads - (store_counts[0] - store_counts[1]),
+               store.loads - store_counts[1])
+    diag.count("筛选视图 LRU", view_cache.lru.hits - lru_counts[0], view_cache.lru.misses - lru_counts[1])
+    diag.count("派生表", view.hits - view_counts[0], view.misses - view_counts[1])
+    if precomputed_counts is not None:
+        diag.count("预计算表", dataset.precomputed.hits - precomputed_counts[0],
+                   dataset.precomputed.misses - precomputed_counts[1])
+    with st.sidebar.expander("🩺 运行诊断", expanded=False):
+        st.caption(f"本会话重跑 {diag.reruns} 次 · 数据版本 {dataset.version}")
+        st.markdown("**区块耗时**")
+        st.dataframe(diag.section_table(), hide_index=True, use_container_width=True)
+        st.markdown("**图表**（构建 + 输出耗时）")
+        # 载荷大小需把各图表最近一次的输出再序列化一次，勾选时才计算
+        payload = st.checkbox("统计图表载荷大小", value=False, key='diagnostics_payload')
+        st.dataframe(diag.figure_table(payload), hide_index=True, use_container_width=True)
+        st.markdown("**缓存**")
+        st.dataframe(diag.cache_table(), hide_index=True, use_container_width=True)
+
+if profiler is not None:
+    st.session_state.pop('profiler', None)
+    profiler.stop(view.state, version=dataset.version)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+calculate_yearly_rank 基准：向量化实现 vs 原 groupby.apply 实现
+
+用法：python benchmarks/bench_ranking.py [--scales 1 10 100] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from shoe_analytics import calculate_yearly_rank, load_records  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'marathon_shoe_data.json')
+
+
+def calculate_yearly_rank_apply(data, aggregate=True):
+    """原实现：逐组回调 + 拷贝"""
+    if aggregate:
+        yearly = data.groupby(['year', 'brand', 'type_zh'], observed=True)['share'].mean().reset_index()
+    else:
+        yearly = data.groupby(['year', 'event', 'brand', 'type_zh'], observed=True)['share'].mean().reset_index()
+
+    def add_rank(group):
+        group = group.copy()
+        group['rank'] = group['share'].rank(ascending=False, method='min').astype(int)
+        return group
+
+    if aggregate:
+        ranked = yearly.groupby('year').apply(add_rank).reset_index(drop=True)
+    else:
+        ranked = yearly.groupby(['year', 'event']).apply(add_rank).reset_index(drop=True)
+
+    return ranked
+
+
+def scale_records(records, factor):
+    """复制记录并给赛事加后缀，放大为 factor 倍"""
+    if factor == 1:
+        return records
+    copies = []
+    for i in range(factor):
+        part = records.copy()
+        part['event'] = part['event'] + f'#{i}'
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    records, _ = load_records(DATA_PATH)
+    cohort = records[records['cohort'] == records['cohort'].iloc[0]]
+    # 原实现在新版 pandas 中会提示 apply 作用于分组列
+    warnings.simplefilter('ignore', category=FutureWarning)
+    warnings.simplefilter('ignore', category=DeprecationWarning)
+
+    print(f"{'规模':>6} {'模式':>6} {'apply(ms)':>10} {'向量化(ms)':>10} {'加速比':>7}")
+    for factor in args.scales:
+        data = scale_records(cohort, factor)
+        for aggregate in (True, False):
+            expected = calculate_yearly_rank_apply(data, aggregate)
+            actual = calculate_yearly_rank(data, aggregate)
+            pd.testing.assert_frame_equal(actual, expected)
+
+            old = min(timeit.repeat(lambda: calculate_yearly_rank_apply(data, aggregate), number=1, repeat=args.repeat))
+            new = min(timeit.repeat(lambda: calculate_yearly_rank(data, aggregate), number=1, repeat=args.repeat))
+            mode = '聚合' if aggregate else '分赛事'
+            print(f"{factor:>5}x {mode:>6} {old * 1000:>10.2f} {new * 1000:>10.2f} {old / new:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+各页面计算步骤基准：按 1×/10×/100×/1000× 放大数据集，逐步计时并写出 JSON 结果
+
+用法：python benchmarks/bench_tabs.py [--scales 1 10 100 1000] [--repeat 5] [--tensor] [-o 结果.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_ranking import scale_records  # noqa: E402
+from shoe_analytics import Dataset, FilterState, FilterView, analytics, calculate_yearly_rank, load_records  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BENCH_DIR, '..', 'data', 'marathon_shoe_data.json')
+
+
+def _view(dataset, state):
+    # 新建视图并预先取出筛选结果，使各步骤只计时自身的计算
+    view = FilterView(dataset, state)
+    view.frame
+    return view
+
+
+def steps(dataset, state, brands):
+    """步骤名 -> (准备函数, 计时函数)；准备函数的返回值传给计时函数"""
+    latest_year = state.year_range[1]
+    new_view = lambda: _view(dataset, state)  # noqa: E731
+    return {
+        'global_filter': (lambda: None, lambda _: dataset.select(state.events, state.year_range, state.cohort)),
+        'top20_ranking': (new_view, lambda view: analytics.top_ranking(view, latest_year)),
+        'yearly_rank_aggregate': (new_view, lambda view: calculate_yearly_rank(view.frame, True)),
+        'yearly_rank_by_event': (new_view, lambda view: calculate_yearly_rank(view.frame, False)),
+        'jordan_heatmap': (new_view, lambda view: view.heatmap('乔丹')),
+        'radar_metrics': (new_view, lambda view: view.radar_metrics(brands)),
+        'type_trends': (new_view, lambda view: (
+            view.type_trend(), view.top10_by_type(),
+            view.brand_rank_trend(analytics.DOMESTIC_LEADERS), view.brand_rank_trend(analytics.INTERNATIONAL_LEADERS))),
+    }
+
+
+def measure(setup, func, repeat):
+    """重复 repeat 次，每次先执行准备函数（不计时），返回各次耗时（秒）"""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pa.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tensor', action='store_true', help="同时构建稠密张量（热力图、雷达图与类型趋势改为沿轴归约）")
+    parser.add_argument('--cohort', default='破3选手')
+    parser.add_argument('-o', '--output', help="结果文件，默认 benchmarks/results/bench_tabs-<时间>.json")
+    args = parser.parse_args(argv)
+
+    records, extras = load_records(DATA_PATH)
+    results = []
+    print(f"{'规模':>6} {'行数':>9} {'步骤':<24} {'最小(ms)':>10} {'中位(ms)':>10}")
+    for factor in args.scales:
+        data = scale_records(records, factor)
+        start = time.perf_counter()
+        dataset = Dataset.from_records(data, extras['brands'], tensor=args.tensor)
+        build = time.perf_counter() - start
+        options = dataset.options
+        state = FilterState.canonical(options['events'], options['years'], args.cohort)
+        brands = sorted(dataset.select(state.events, state.year_range, state.cohort)['brand'].unique().tolist())
+
+        timings = {'build_dataset': [build]}
+        for name, (setup, func) in steps(dataset, state, brands).items():
+            timings[name] = measure(setup, func, args.repeat)
+        for name, times in timings.items():
+            row = {
+                'scale': factor,
+                'rows': len(data),
+                'step': name,
+                'repeat': len(times),
+                'min_ms': min(times) * 1000,
+                'median_ms': statistics.median(times) * 1000,
+            }
+            results.append(row)
+            print(f"{factor:>5}x {len(data):>9} {name:<24} {row['min_ms']:>10.2f} {row['median_ms']:>10.2f}")
+
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"bench_tabs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'environment': environment(),
+            'config': {'scales': args.scales, 'repeat': args.repeat, 'tensor': args.tensor, 'cohort': args.cohort},
+            'results': results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+预计算存储一致性检查：生成存储后对每个筛选状态逐个派生表比较查表结果与实时计算结果（assert_frame_equal，精确比较），
+并检查除 LIVE_TABLES 外的每个派生表都能从存储查到；新增派生表未加入存储时检查失败
+
+用法：python benchmarks/check_views.py [数据 JSON] [--every N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pandas.testing import assert_frame_equal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from shoe_analytics import FilterView, analytics, open_dataset  # noqa: E402
+from shoe_analytics.derived import _TABLES  # noqa: E402
+from shoe_analytics.precompute import _RESOLVERS, LIVE_TABLES, PrecomputedViews, build_views, iter_states  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BENCH_DIR, '..', 'data', 'marathon_shoe_data.json')
+
+LEADERS = tuple(analytics.DOMESTIC_LEADERS), tuple(analytics.INTERNATIONAL_LEADERS)
+
+
+def calls(state, brands):
+    """派生表名 -> 要比较的参数列表（带品牌参数的表取代表品牌、前几个品牌与不存在的品牌）"""
+    sample = tuple(brands[:5])
+    return {
+        'brand_year_means': [()],
+        'range_means': [(state.year_range,)] + [((y, y),) for y in range(state.year_range[0], state.year_range[1] + 1)],
+        'yearly_rank': [(True,), (False,)],
+        'event_share_means': [()],
+        'type_trend': [()],
+        'top10_by_type': [()],
+        'top10_totals': [()],
+        'brand_rank_trend': [(LEADERS[0],), (LEADERS[1],), (sample,), (('乔丹', '不存在'),)],
+        'brand_radar': [()],
+        'share_changes': [()],
+        'brand_profiles': [()],
+        'heatmap': [(b,) for b in sample],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="预计算存储一致性检查")
+    parser.add_argument('source', nargs='?', default=DATA_PATH, help="JSON 数据文件")
+    parser.add_argument('--every', type=int, default=1, help="每隔 N 个筛选状态检查一个（默认全部）")
+    args = parser.parse_args(argv)
+
+    live = open_dataset(args.source)
+    # 覆盖检查：每个派生表要么可查表，要么明确列为实时计算
+    uncovered = sorted(set(_TABLES) - set(_RESOLVERS) - LIVE_TABLES)
+    unchecked = sorted(set(_TABLES) - LIVE_TABLES - set(calls(next(iter_states(live.options)), []).keys()))
+    if uncovered or unchecked:
+        raise SystemExit(f"未加入预计算存储的派生表：{uncovered}；本脚本未比较的派生表：{unchecked}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'views')
+        start = time.perf_counter()
+        manifest = build_views(args.source, output)
+        size = sum(os.path.getsize(os.path.join(output, f)) for f in os.listdir(output))
+        print(f"生成 {len(manifest['states'])} 个状态，耗时 {time.perf_counter() - start:.1f}s，"
+              f"存储 {size / 2 ** 20:.2f} MB")
+
+        served = open_dataset(args.source)
+        served.precomputed = store = PrecomputedViews(output)
+        failures = 0
+        states = list(iter_states(live.options))[::args.every]
+        for state in states:
+            expected, actual = FilterView(live, state), FilterView(served, state)
+            brands = sorted(expected.brand_profiles().index)
+            for name, arg_list in calls(state, brands).items():
+                for call_args in arg_list:
+                    misses = store.misses
+                    try:
+                        got = actual.table(name, *call_args)
+                        if store.misses != misses:
+                            raise AssertionError("未命中存储")
+                        want = expected.table(name, *call_args)
+                        assert_frame_equal(want, got, check_exact=True)
+                    except AssertionError as e:
+                        failures += 1
+                        if failures <= 5:
+                            print(f"不一致：{state} {name}{call_args}\n{e}")
+        print(f"检查 {len(states)} 个状态：命中 {store.hits}，未命中 {store.misses}，不一致 {failures}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+马拉松跑鞋品牌数据分析 - 数据与计算模块
+"""
+
+from . import analytics
+from .bundle import compile_bundle, read_bundle, validate, widget_options
+from .cache import FilterState, LRUCache
+from .dataset import Dataset, PartitionIndex, freeze_frame, open_dataset
+from .derived import FilterView, ViewCache, derived_table
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics, NullDiagnostics
+from .metrics import RADAR_DIMENSIONS, brand_stats, radar_scores
+from .narrative import brand_share_changes, generate_dynamic_analysis, rank_change_analysis, share_change_narratives
+from .precompute import PrecomputedViews, build_views, open_views
+from .profiling import RerunProfiler
+from .ranking import calculate_yearly_rank
+from .reload import DatasetStore
+from .storage import (ARROW_SCHEMA, RECORD_SCHEMA, TYPE_ZH, compact_records, fingerprint, load_records, read_arrow,
+                      read_json, read_parquet, write_arrow, write_parquet)
+from .synthetic import SyntheticSpec, write_synthetic_json, write_synthetic_parquet
+from .tensor import ShareTensor
+from .trends import TypeSeries
+
+__all__ = [
+    'ARROW_SCHEMA',
+    'Dataset',
+    'DatasetStore',
+    'Diagnostics',
+    'FilterState',
+    'FilterView',
+    'LRUCache',
+    'NULL_DIAGNOSTICS',
+    'NullDiagnostics',
+    'PartitionIndex',
+    'PrecomputedViews',
+    'RADAR_DIMENSIONS',
+    'RECORD_SCHEMA',
+    'RerunProfiler',
+    'ShareTensor',
+    'SyntheticSpec',
+    'TYPE_ZH',
+    'TypeSeries',
+    'ViewCache',
+    'analytics',
+    'brand_share_changes',
+    'brand_stats',
+    'build_views',
+    'calculate_yearly_rank',
+    'compact_records',
+    'compile_bundle',
+    'derived_table',
+    'fingerprint',
+    'freeze_frame',
+    'generate_dynamic_analysis',
+    'load_records',
+    'open_dataset',
+    'open_views',
+    'radar_scores',
+    'rank_change_analysis',
+    'read_arrow',
+    'read_bundle',
+    'read_json',
+    'read_parquet',
+    'share_change_narratives',
+    'validate',
+    'widget_options',
+    'write_arrow',
+    'write_parquet',
+    'write_synthetic_json',
+    'write_synthetic_parquet',
+]
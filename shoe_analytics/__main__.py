@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+命令行入口：python -m shoe_analytics <命令>
+"""
+
+import argparse
+
+from . import bundle, precompute, storage, synthetic
+
+
+def cmd_convert(args):
+    records, extras = storage.read_json(args.source)
+    output = args.output or storage.columnar_path(args.source, '.' + args.format)
+    write = storage.write_arrow if args.format == 'arrow' else storage.write_parquet
+    write(records, extras, output)
+    print(f"已写出 {len(records)} 条记录 -> {output}")
+
+
+def cmd_compile(args):
+    try:
+        manifest = bundle.compile_bundle(args.source, args.output)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    for warning in manifest['warnings']:
+        print(f"警告：{warning}")
+    output = args.output or storage.columnar_path(args.source, storage.BUNDLE_SUFFIX)
+    print(f"已编译 {manifest['rows']} 条记录 -> {output}（版本 {manifest['version']}）")
+
+
+def cmd_precompute(args):
+    manifest = precompute.build_views(args.source, args.output)
+    output = args.output or storage.columnar_path(args.source, precompute.VIEWS_SUFFIX)
+    print(f"已预计算 {len(manifest['states'])} 个筛选状态 -> {output}")
+
+
+def cmd_synth(args):
+    spec = synthetic.SyntheticSpec(events=args.events, years=args.years, cohorts=args.cohorts, brands=args.brands,
+                                   min_brands=args.min_brands, max_brands=args.max_brands, seed=args.seed)
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'json')
+    write = synthetic.write_synthetic_parquet if fmt == 'parquet' else synthetic.write_synthetic_json
+    total = write(spec, args.output)
+    print(f"已生成 {total} 条记录 -> {args.output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m shoe_analytics', description="马拉松跑鞋数据工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('convert', help="将 JSON 数据转换为列式（Parquet / Arrow IPC）记录表")
+    p.add_argument('source', nargs='?', default='data/marathon_shoe_data.json', help="JSON 数据文件")
+    p.add_argument('-f', '--format', choices=['parquet', 'arrow'], default='parquet',
+                   help="parquet：压缩存储；arrow：可内存映射，多个进程共享同一份记录表")
+    p.add_argument('-o', '--output', help="输出路径，默认与 JSON 同名、扩展名为格式名")
+    p.set_defaults(func=cmd_convert)
+
+    p = subparsers.add_parser('compile', help="校验 JSON 数据并编译为带版本的产物目录，应用启动时直接使用")
+    p.add_argument('source', nargs='?', default='data/marathon_shoe_data.json', help="JSON 数据文件")
+    p.add_argument('-o', '--output', help="输出目录，默认与 JSON 同名的 .bundle")
+    p.set_defaults(func=cmd_compile)
+
+    p = subparsers.add_parser('precompute', help="穷举所有侧边栏筛选组合，预计算各 Tab 的派生表")
+    p.add_argument('source', nargs='?', default='data/marathon_shoe_data.json', help="JSON 数据文件")
+    p.add_argument('-o', '--output', help="输出目录，默认与 JSON 同名的 .views")
+    p.set_defaults(func=cmd_precompute)
+
+    p = subparsers.add_parser('synth', help="生成与原数据同结构的可复现合成数据集（流式写出，用于压测）")
+    p.add_argument('output', help="输出文件（.json 或 .parquet）")
+    p.add_argument('-f', '--format', choices=['json', 'parquet'], help="默认按扩展名判断")
+    p.add_argument('--events', type=int, default=200, help="赛事数")
+    p.add_argument('--years', type=int, default=20, help="年份数")
+    p.add_argument('--cohorts', type=int, default=4, help="队列数")
+    p.add_argument('--brands', type=int, default=2000, help="品牌数")
+    p.add_argument('--min-brands', type=int, default=20, help="每个分区最少品牌数")
+    p.add_argument('--max-brands', type=int, default=120, help="每个分区最多品牌数")
+    p.add_argument('--seed', type=int, default=0, help="随机种子，相同参数与种子得到相同数据")
+    p.set_defaults(func=cmd_synth)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
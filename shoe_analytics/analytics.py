@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+分析接口：各页面所需的数据与指标，均为数据集视图上的纯函数，可脱离 Streamlit 在脚本、批处理与基准测试中使用
+"""
+
+from .cache import FilterState
+from .derived import FilterView
+from .narrative import rank_change_text, share_change_narratives
+from .trends import DOMESTIC_LEADERS, INTERNATIONAL_LEADERS  # noqa: F401  Tab4 中的代表品牌
+
+
+def filter_view(dataset, events=None, year_range=None, cohort=None):
+    """按筛选条件取数据集视图，未指定的条件取全部赛事、全部年份与第一个队列"""
+    options = dataset.options
+    events = options['events'] if events is None else events
+    year_range = options['years'] if year_range is None else year_range
+    cohort = options['cohorts'][0] if cohort is None else cohort
+    return FilterView(dataset, FilterState.canonical(events, year_range, cohort))
+
+
+# ==================== Tab1: 总览排行 ====================
+def top_ranking(view, year, n=20):
+    """某年各品牌在所选赛事上的平均份额排行（前 n 名），附名次与保留一位小数的份额"""
+    ranking = view.range_means((year, year))
+    ranking = ranking.sort_values('share_pct', ascending=False).head(n).reset_index(drop=True)
+    ranking['排名'] = range(1, len(ranking) + 1)
+    ranking['份额(%)'] = ranking['share_pct'].astype(float).round(1)
+    return ranking
+
+
+def overview_insights(ranking, brand='乔丹', leader='特步'):
+    """总览关键指标：指定品牌的名次与份额、领跑品牌份额、国产品牌占比、TOP10 国产品牌数（不在榜上的取 None）"""
+    brand_row = ranking[ranking['brand'] == brand]
+    leader_row = ranking[ranking['brand'] == leader]
+    top10 = ranking.head(10)
+    return {
+        'brand_rank': brand_row['排名'].values[0] if len(brand_row) > 0 else None,
+        'brand_share': brand_row['份额(%)'].values[0] if len(brand_row) > 0 else None,
+        'leader_share': leader_row['份额(%)'].values[0] if len(leader_row) > 0 else None,
+        'domestic_share': ranking[ranking['type_zh'] == '国产']['份额(%)'].sum(),
+        'top10_domestic': len(top10[top10['type_zh'] == '国产']),
+    }
+
+
+# ==================== Tab2: 品牌专题 ====================
+def brand_choices(view):
+    """筛选范围内有数据的品牌（排序）"""
+    return sorted(view.brand_profiles().index.tolist())
+
+
+def brand_profile(view, brand):
+    """品牌专题指标（查全部品牌的专题表）：最佳/最差排名、平均排名与份额、首末年份排名；无数据时返回 None"""
+    profiles = view.brand_profiles()
+    if brand not in profiles.index:
+        return None
+    return profiles.loc[brand]
+
+
+def brand_report(view, brand, profile):
+    """品牌专题的份额变化文案与排名变化 (语气, 文案)；不足两年时排名变化为 None，品牌无数据（profile 为 None）时返回 (None, None)"""
+    if profile is None:
+        return None, None
+    analysis_text = share_change_narratives(view.share_changes(), [brand])[0]
+    rank_change = rank_change_text(profile['start_rank'], profile['end_rank']) if profile['years'] >= 2 else None
+    return analysis_text, rank_change
+
+
+def brand_share_trend(view, brand, aggregate):
+    """品牌份额趋势：聚合模式为所选赛事的年度平均，否则按 (年份, 赛事)"""
+    if aggregate:
+        return view.brand_rows(brand, 'brand_year_means')
+    return view.brand_rows(brand, 'event_share_means')[['year', 'event', 'share_pct']].reset_index(drop=True)
+
+
+def brand_rank_series(view, brand, aggregate):
+    """品牌排名趋势：聚合模式为各年平均份额的年度排名，否则为各赛事内的排名"""
+    brand_rank = view.brand_rows(brand, 'yearly_rank', aggregate)
+    if aggregate:
+        return brand_rank.groupby('year', observed=True)['rank'].mean().reset_index()
+    return brand_rank
+
+
+# ==================== Tab3: 品牌对比 ====================
+def compare_candidates(view, anchor='乔丹', n=5):
+    """可选品牌（排序）与默认对比品牌（anchor + 平均份额最高的其余品牌，共 n 个）"""
+    means = view.range_means(view.state.year_range).set_index('brand')['share_pct']
+    top_brands = means.sort_values(ascending=False).head(10).index.tolist()
+    default_brands = [anchor] + [b for b in top_brands if b != anchor][:n - 1]
+    return sorted(means.index.tolist()), default_brands
+
+
+def compare_rank_trend(view, brands, aggregate):
+    """所选品牌每年的平均排名"""
+    ranked = view.yearly_rank(aggregate)
+    ranked = ranked[ranked['brand'].isin(brands)]
+    return ranked.groupby(['year', 'brand'], observed=True)['rank'].mean().reset_index()
+
+
+def brand_narratives(view, brands):
+    """所选品牌的份额变化文案，按所选顺序（查全部品牌的首末年份份额表，不逐个品牌分组）"""
+    return share_change_narratives(view.share_changes(), brands)
+
+
+def compare_conclusion(radar_data):
+    """按排名得分取综合表现最佳与最弱的品牌，不足两个品牌时返回 None"""
+    if len(radar_data) < 2:
+        return None
+    sorted_by_rank = sorted(radar_data, key=lambda x: x['排名得分'], reverse=True)
+    return sorted_by_rank[0], sorted_by_rank[-1]
+
+
+# ==================== Tab4: 国产vs国际 ====================
+def domestic_summary(view):
+    """国产品牌首末年份合计份额及其变化、TOP10 国产品牌平均数量；无数据时返回 None"""
+    type_trend = view.type_trend()
+    if len(type_trend) == 0:
+        return None
+    min_yr = type_trend['year'].min()
+    max_yr = type_trend['year'].max()
+    dom_first = type_trend[(type_trend['year'] == min_yr) & (type_trend['brand_type'] == 'domestic')]['share_pct'].sum()
+    dom_last = type_trend[(type_trend['year'] == max_yr) & (type_trend['brand_type'] == 'domestic')]['share_pct'].sum()
+    top10_dom = view.top10_totals().loc['国产']
+    return {
+        'min_year': min_yr,
+        'max_year': max_yr,
+        'first': dom_first,
+        'last': dom_last,
+        'change': dom_last - dom_first,
+        'growth_rate': (dom_last - dom_first) / dom_first * 100 if dom_first > 0 else 0,
+        'top10_mean': top10_dom['count'] / top10_dom['years'] if top10_dom['years'] > 0 else None,
+    }
+
+
+def type_share_trend(view):
+    """国产/国际品牌每年的合计份额"""
+    return view.type_trend().groupby(['year', 'type_zh'], observed=True)['share_pct'].sum().reset_index()
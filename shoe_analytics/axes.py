@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+坐标轴工具：聚合立方体、稠密张量与趋势序列共用的取值编码与年份区间截取，保证各实现的边界处理一致
+"""
+
+import pandas as pd
+
+
+def category_codes(values, categories):
+    """取值在坐标轴 categories 上的位置，不在轴上的取值为 -1"""
+    return pd.Categorical(values, categories=categories).codes
+
+
+def year_slice(years, year_range):
+    """年份区间在连续年份轴 years 上的切片：区间超出轴的部分截去，与轴不相交时为空切片"""
+    if not len(years):
+        return slice(0, 0)
+    lo = max(int(year_range[0]), int(years[0])) - int(years[0])
+    hi = max(min(int(year_range[1]), int(years[-1])) - int(years[0]) + 1, lo)
+    return slice(lo, hi)
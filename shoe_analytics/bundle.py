@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+数据集编译：构建期校验原始数据，一次性产出带版本的产物目录（记录表、维度字典、控件选项、预聚合立方体），应用启动直接使用
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .cube import AggregateCube
+from .storage import (BUNDLE_MANIFEST, BUNDLE_RECORDS, BUNDLE_SUFFIX, TYPE_ZH, columnar_path, file_digest,
+                      read_arrow, read_json, replace_directory, write_arrow)
+
+# 产物目录格式版本，不兼容的改动时递增
+BUNDLE_FORMAT = 2
+
+# 预聚合立方体数组（稀疏：分组边界、单元品牌与各单元的和），各存为一个 .npy 文件，读取时内存映射
+CUBE_ARRAYS = ('offsets', 'brand', 'sums', 'pct_sums', 'counts')
+
+REQUIRED_COLUMNS = ['year', 'event', 'cohort', 'brand', 'brand_type', 'rank', 'share']
+
+
+def widget_options(records, metadata=None):
+    """侧边栏控件选项：赛事（排序）、年份范围、队列（按元数据中的顺序）"""
+    cohorts = [str(c) for c in pd.unique(records['cohort'].astype(str))]
+    order = [c for c in (metadata or {}).get('cohorts', []) if c in cohorts]
+    return {
+        'events': sorted(str(e) for e in pd.unique(records['event'].astype(str))),
+        'years': [int(records['year'].min()), int(records['year'].max())] if len(records) else [],
+        'cohorts': order + sorted(c for c in cohorts if c not in order),
+    }
+
+
+def validate(records, extras):
+    """校验原始记录，返回 (错误列表, 警告列表)；有错误的数据不能编译"""
+    errors, warnings = [], []
+    missing = [c for c in REQUIRED_COLUMNS if c not in records.columns]
+    if missing:
+        return [f"缺少字段：{missing}"], warnings
+    nulls = records[REQUIRED_COLUMNS].isna().sum()
+    for column, count in nulls[nulls > 0].items():
+        errors.append(f"字段 {column} 有 {count} 个空值")
+    if errors:
+        return errors, warnings
+
+    for column in ('year', 'rank'):
+        if not pd.api.types.is_integer_dtype(records[column]):
+            errors.append(f"字段 {column} 不是整数")
+    if (records['rank'] < 1).any():
+        errors.append(f"{int((records['rank'] < 1).sum())} 条记录的排名小于 1")
+    out_of_range = ~records['share'].between(0, 1)
+    if out_of_range.any():
+        errors.append(f"{int(out_of_range.sum())} 条记录的份额不在 [0, 1] 内")
+    unknown_types = sorted(set(records['brand_type']) - set(TYPE_ZH))
+    if unknown_types:
+        errors.append(f"未知的品牌类型：{unknown_types}")
+
+    brands = extras.get('brands', {})
+    unknown_brands = sorted(set(records['brand']) - set(brands))
+    if unknown_brands:
+        errors.append(f"品牌信息中缺少：{unknown_brands}")
+    declared = records['brand'].map(lambda b: brands.get(b, {}).get('type'))
+    mismatched = sorted(set(records.loc[declared.notna() & (declared != records['brand_type']), 'brand']))
+    if mismatched:
+        errors.append(f"记录中的品牌类型与品牌信息不一致：{mismatched}")
+    multi_typed = records.groupby('brand')['brand_type'].nunique()
+    if (multi_typed > 1).any():
+        errors.append(f"品牌类型不唯一：{sorted(multi_typed[multi_typed > 1].index)}")
+    partition_sums = records.groupby(['cohort', 'event', 'year'])['share'].sum()
+    if (partition_sums > 1 + 1e-6).any():
+        errors.append(f"{int((partition_sums > 1 + 1e-6).sum())} 个 (队列, 赛事, 年份) 分区的份额合计超过 1")
+
+    duplicated = records.duplicated(['cohort', 'event', 'year', 'brand'], keep=False)
+    if duplicated.any():
+        keys = records.loc[duplicated, ['cohort', 'event', 'year', 'brand']].drop_duplicates()
+        warnings.append(f"{len(keys)} 组 (队列, 赛事, 年份, 品牌) 有重复记录：{keys.to_dict('records')}")
+    unused = sorted(set(brands) - set(records['brand']))
+    if unused:
+        warnings.append(f"品牌信息中的品牌没有任何记录：{unused}")
+    metadata = extras.get('metadata') or {}
+    if 'total_records' in metadata and metadata['total_records'] != len(records):
+        warnings.append(f"metadata.total_records={metadata['total_records']}，实际 {len(records)} 条")
+    for key, column in (('events', 'event'), ('cohorts', 'cohort'), ('years', 'year')):
+        if key in metadata and sorted(metadata[key]) != sorted(records[column].unique().tolist()):
+            warnings.append(f"metadata.{key} 与记录中的取值不一致")
+    return errors, warnings
+
+
+def compile_bundle(json_path, output=None):
+    """校验并编译 JSON 数据为产物目录，返回清单；校验失败时抛出 ValueError"""
+    records, extras = read_json(json_path)
+    errors, warnings = validate(records, extras)
+    if errors:
+        raise ValueError(f"{json_path} 校验失败：\n" + '\n'.join(f"- {e}" for e in errors))
+
+    output = output or columnar_path(json_path, BUNDLE_SUFFIX)
+    tmp_dir = f"{output}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        write_arrow(records, extras, os.path.join(tmp_dir, BUNDLE_RECORDS))
+        # 从写出的记录表（已按队列排序）构建立方体，与运行时由同一记录表构建的结果一致
+        prepared, _ = read_arrow(os.path.join(tmp_dir, BUNDLE_RECORDS))
+        cube = AggregateCube(prepared)
+        for name in CUBE_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"cube_{name}.npy"), getattr(cube, name))
+
+        files = {name: file_digest(os.path.join(tmp_dir, name)) for name in sorted(os.listdir(tmp_dir))}
+        brands = extras['brands']
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'version': hashlib.blake2b(json.dumps(files, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest(),
+            'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'source': {'path': os.path.basename(json_path), 'digest': file_digest(json_path)},
+            'rows': len(prepared),
+            'files': files,
+            'dimensions': {
+                **cube.axes(),
+                'brand_info': {b: {**brands[b], 'type_zh': TYPE_ZH[brands[b]['type']]} for b in cube.brands},
+                'type_names': TYPE_ZH,
+            },
+            'options': widget_options(prepared, extras.get('metadata')),
+            'warnings': warnings,
+        }
+        with open(os.path.join(tmp_dir, BUNDLE_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        replace_directory(tmp_dir, output)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+def read_bundle(path):
+    """读取产物目录，返回 (记录表, extras, 立方体, 控件选项, 清单)；记录表与立方体数组均为只读内存映射"""
+    with open(os.path.join(path, BUNDLE_MANIFEST), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"{path} 的产物格式 {manifest.get('format')} 与当前版本 {BUNDLE_FORMAT} 不兼容，请重新编译")
+    records, extras = read_arrow(os.path.join(path, BUNDLE_RECORDS))
+    arrays = [np.load(os.path.join(path, f"cube_{name}.npy"), mmap_mode='r') for name in CUBE_ARRAYS]
+    cube = AggregateCube.from_arrays(manifest['dimensions'], *arrays)
+    return records, extras, cube, manifest['options'], manifest
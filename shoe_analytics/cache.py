@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+筛选结果缓存：按规范化的侧边栏状态缓存，条目数与字节数双重上限的 LRU 淘汰
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class FilterState:
+    """规范化的侧边栏筛选状态，可作缓存键"""
+    events: tuple
+    year_range: tuple
+    cohort: str
+
+    @classmethod
+    def canonical(cls, events, year_range, cohort):
+        # 赛事选择与顺序无关，年份统一为 int，保证等价状态得到同一个键
+        return cls(tuple(sorted(set(events))), (int(year_range[0]), int(year_range[1])), cohort)
+
+
+def nbytes(value):
+    """估算缓存值占用的字节数；表中的字符串为分类列或与记录表共享的对象，只计列数组本身（不逐个遍历字符串）"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=False))
+    if isinstance(value, dict):
+        # 分组行位置：键 -> 数组
+        return sum(getattr(v, 'nbytes', 0) for v in value.values())
+    return 0
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存，超出条目数或字节预算时淘汰最久未用的条目"""
+
+    def __init__(self, max_entries=256, max_bytes=256 * 2 ** 20, sizeof=nbytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            # 单个值超出预算时不缓存
+            if size > self.max_bytes or self.max_entries <= 0:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def resize(self, key):
+        """条目的值原地增长后重新计量字节数，必要时淘汰"""
+        with self._lock:
+            if key not in self._entries:
+                return
+            value, size = self._entries[key]
+            new_size = self._sizeof(value)
+            self._entries[key] = (value, new_size)
+            self._bytes += new_size - size
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """命中则直接返回，否则计算后写入缓存（计算在锁外进行）"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+运行配置：从环境变量读取各项开关
+"""
+
+import os
+
+
+def env_flag(name, default=False):
+    """读取布尔型环境变量"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_str(name, default=None):
+    """读取字符串型环境变量，未设置或为空时取默认值"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip()
+
+
+def env_int(name, default):
+    """读取整型环境变量"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return int(value)
+
+
+# 紧凑内存模式：字符串列转分类类型，年份/排名用小整型，份额用 float32
+COMPACT = env_flag('SHOE_COMPACT')
+
+# 共享只读数据集：每个进程只保留一份（st.cache_resource），数组只读，筛选结果尽量为不拷贝的切片
+SHARED_DATASET = env_flag('SHOE_SHARED_DATASET')
+
+# 额外构建 品牌 × 赛事 × 年份 × 队列 稠密张量，国产/国际合计、热力图与雷达图改为沿轴归约
+TENSOR = env_flag('SHOE_TENSOR')
+
+# 懒加载导航：用页面切换代替 st.tabs，每次重跑只计算当前页面
+LAZY_TABS = env_flag('SHOE_LAZY_TABS')
+
+# 筛选结果缓存：最多缓存的筛选状态数与总字节预算（MB）
+FILTER_CACHE_ENTRIES = env_int('SHOE_FILTER_CACHE_ENTRIES', 256)
+FILTER_CACHE_MB = env_int('SHOE_FILTER_CACHE_MB', 256)
+
+# 数据热加载：每隔多少秒检查一次数据文件指纹，变化时后台加载新版本（负数关闭）
+RELOAD_INTERVAL = env_int('SHOE_RELOAD_INTERVAL', 5)
+
+# 预计算模式：存在与当前 JSON 一致的穷举预计算存储（python -m shoe_analytics precompute）时按筛选状态查表
+PRECOMPUTED = env_flag('SHOE_PRECOMPUTED')
+
+# 运行诊断：侧边栏显示本会话各区块/图表耗时、重跑次数、缓存命中率与图表载荷大小
+DIAGNOSTICS = env_flag('SHOE_DIAGNOSTICS')
+
+# 重跑剖析：设置目录时用 cProfile（pstats）或 pyinstrument（火焰图 HTML）剖析每次整页重跑，按侧边栏状态命名写入该目录
+PROFILE_DIR = env_str('SHOE_PROFILE_DIR')
+PROFILER = env_str('SHOE_PROFILER', 'cprofile')
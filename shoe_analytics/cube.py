@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+可加聚合立方体：按 (cohort, year, event, brand) 预先累加份额和与条目数，任意赛事子集的均值只需把若干单元相加；
+只保存有记录的单元（稀疏），按 (cohort, event, year) 分组连续存放
+"""
+
+import numpy as np
+import pandas as pd
+
+from .axes import category_codes, year_slice
+
+
+def _kahan_add(total, compensation, index, values):
+    """把 values 逐项累加到 total[index]（Kahan 补偿，与 pandas 分组求和的累加方式一致）；index 内不重复"""
+    y = values - compensation[index]
+    t = total[index] + y
+    compensation[index] = (t - total[index]) - y
+    total[index] = t
+
+
+class AggregateCube:
+    """(cohort, year, event, brand) 份额和/条目数立方体（稀疏）：
+    有记录的单元按 (cohort, event, year, brand) 排序存放，offsets[c, e, y] 为分组 (c, e, y) 的起始位置"""
+
+    def __init__(self, records):
+        self.cohorts = sorted(records['cohort'].unique())
+        # 赛事轴保持数据中的出现顺序，相加顺序与逐行 groupby 一致
+        self.events = list(pd.unique(records['event'].to_numpy()))
+        # 品牌轴按名称排序，输出顺序与 groupby(['year', 'brand']) 一致
+        self.brands = np.array(sorted(records['brand'].unique()), dtype=object)
+        self.years = np.arange(int(records['year'].min()), int(records['year'].max()) + 1) if len(records) \
+            else np.arange(0)
+        brand_types = records.drop_duplicates('brand').set_index('brand')['type_zh']
+        self.type_zh = np.array([brand_types[b] for b in self.brands], dtype=object)
+        self._index_axes()
+
+        n_events, n_years, n_brands = len(self.events), len(self.years), len(self.brands)
+        group = (category_codes(records['cohort'], self.cohorts).astype(np.int64) * n_events
+                 + category_codes(records['event'], self.events)) * n_years \
+            + (records['year'].to_numpy(dtype=np.int64) - (self.years[0] if len(self.years) else 0))
+        cells, cell = np.unique(group * n_brands + category_codes(records['brand'], self.brands), return_inverse=True)
+        # 单元内按记录顺序相加，与稠密数组上的 np.add.at 结果相同
+        self.brand = (cells % max(n_brands, 1)).astype(np.int32)
+        self.sums = np.zeros(len(cells))
+        self.pct_sums = np.zeros(len(cells))
+        self.counts = np.zeros(len(cells), dtype=np.int32)
+        np.add.at(self.sums, cell, records['share'].to_numpy(dtype=np.float64))
+        np.add.at(self.pct_sums, cell, records['share_pct'].to_numpy(dtype=np.float64))
+        np.add.at(self.counts, cell, 1)
+
+        # 每个 (cohort, event) 的 years + 1 个分组边界：第 y 年的单元为 offsets[c, e, y]:offsets[c, e, y + 1]
+        n_blocks = len(self.cohorts) * n_events
+        bounds = np.searchsorted(cells // max(n_brands, 1), np.arange(n_blocks * n_years + 1))
+        self.offsets = bounds[np.arange(n_blocks)[:, None] * n_years + np.arange(n_years + 1)] \
+            .reshape(len(self.cohorts), n_events, n_years + 1)
+        self._prefix = None
+
+    @classmethod
+    def from_arrays(cls, axes, offsets, brand, sums, pct_sums, counts):
+        """由已算好的坐标轴与数组恢复立方体（数据集编译产物，数组可为只读内存映射）"""
+        cube = cls.__new__(cls)
+        cube.cohorts = list(axes['cohorts'])
+        cube.events = list(axes['events'])
+        cube.brands = np.array(axes['brands'], dtype=object)
+        cube.years = np.asarray(axes['years'], dtype=np.int64)
+        cube.type_zh = np.array(axes['type_zh'], dtype=object)
+        cube.offsets, cube.brand = offsets, brand
+        cube.sums, cube.pct_sums, cube.counts = sums, pct_sums, counts
+        cube._index_axes()
+        cube._prefix = None
+        return cube
+
+    def axes(self):
+        """坐标轴（可 JSON 序列化），与 from_arrays 对应"""
+        return {
+            'cohorts': [str(c) for c in self.cohorts],
+            'events': [str(e) for e in self.events],
+            'brands': [str(b) for b in self.brands],
+            'years': [int(y) for y in self.years],
+            'type_zh': [str(t) for t in self.type_zh],
+        }
+
+    def _index_axes(self):
+        self._cohort_pos = {c: i for i, c in enumerate(self.cohorts)}
+        self._event_pos = {e: i for i, e in enumerate(self.events)}
+
+    @property
+    def nbytes(self):
+        arrays = (self.offsets, self.brand, self.sums, self.pct_sums, self.counts) + (self._prefix or ())
+        return sum(a.nbytes for a in arrays)
+
+    def prefix(self):
+        """沿年份的前缀和（首次查询年份区间时构建）：单元改按 (cohort, event, brand, year) 排序，
+        返回 (品牌段键, 品牌段起点, 单元键, 段内累计百分比份额和, 段内累计条目数)"""
+        if self._prefix is None:
+            n_years, n_brands = len(self.years), len(self.brands)
+            group = np.repeat(np.arange(self.offsets.shape[0] * self.offsets.shape[1] * n_years),
+                              np.diff(self.offsets, axis=2).ravel())
+            # 每个 (cohort, event, brand) 的单元连续存放、年份升序（稳定排序保持原有的年份顺序）
+            run = group // max(n_years, 1) * n_brands + self.brand
+            order = np.argsort(run, kind='stable')
+            run = run[order]
+            run_keys, run_starts, run_lengths = np.unique(run, return_index=True, return_counts=True)
+            cum_pct_sums, cum_counts = self.pct_sums[order], self.counts[order].astype(np.int64)
+            # 段内逐年累加（每段最多 years 个单元，按段内位置分层向量化）
+            depth = np.arange(len(run)) - np.repeat(run_starts, run_lengths)
+            for d in range(1, int(run_lengths.max(initial=0))):
+                at = np.flatnonzero(depth == d)
+                cum_pct_sums[at] += cum_pct_sums[at - 1]
+                cum_counts[at] += cum_counts[at - 1]
+            self._prefix = (run_keys, run_starts, run * n_years + group[order] % max(n_years, 1),
+                            cum_pct_sums, cum_counts)
+        return self._prefix
+
+    def _locate(self, events, year_range, cohort):
+        # (队列位置, 年份切片, 赛事位置列表)；队列不存在或未选赛事时返回 None
+        event_idx = sorted(self._event_pos[e] for e in events if e in self._event_pos)
+        if cohort not in self._cohort_pos or not event_idx or not len(self.years):
+            return None
+        return self._cohort_pos[cohort], year_slice(self.years, year_range), event_idx
+
+    def _cells(self, ci, ei, years):
+        # 某队列、某赛事在年份切片内的单元：(单元位置切片, 相对年份, 品牌位置)
+        bounds = self.offsets[ci, ei, years.start:years.stop + 1]
+        cells = slice(int(bounds[0]), int(bounds[-1]))
+        return cells, np.repeat(np.arange(years.stop - years.start), np.diff(bounds)), self.brand[cells]
+
+    def event_subset(self, events, year_range, cohort):
+        """把赛事子集对应的单元相加，返回 (年份, 份额和, 百分比份额和, 条目数)，后三者形如 (年份, 品牌)"""
+        located = self._locate(events, year_range, cohort)
+        if located is None:
+            empty = np.zeros((0, len(self.brands)))
+            return self.years[:0], empty, empty, empty.astype(np.int32)
+        ci, years, event_idx = located
+        shape = (years.stop - years.start, len(self.brands))
+        sums, pct_sums, counts = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype=np.int32)
+        compensation = (np.zeros(shape), np.zeros(shape))
+        # 沿赛事轴逐个相加，只触及有记录的单元（空单元跳过，与 pandas 分组均值一致）
+        for ei in event_idx:
+            cells, rows, brands = self._cells(ci, ei, years)
+            _kahan_add(sums, compensation[0], (rows, brands), self.sums[cells])
+            _kahan_add(pct_sums, compensation[1], (rows, brands), self.pct_sums[cells])
+            counts[rows, brands] += self.counts[cells]
+        return self.years[years], sums, pct_sums, counts
+
+    def event_subset_means(self, events, year_range, cohort):
+        """任意赛事子集上每年各品牌的平均份额（与对原始记录 groupby(['year', 'brand']).mean() 等价）"""
+        years, sums, pct_sums, counts = self.event_subset(events, year_range, cohort)
+        yi, bi = np.nonzero(counts)
+        return pd.DataFrame({
+            'year': years[yi],
+            'brand': self.brands[bi],
+            'type_zh': self.type_zh[bi],
+            'share': sums[yi, bi] / counts[yi, bi],
+            'share_pct': pct_sums[yi, bi] / counts[yi, bi],
+        })
+
+    def range_sums(self, events, year_range, cohort):
+        """年份区间内各品牌在赛事子集上的百分比份额和与条目数（形如 (品牌,)），前缀和相减，代价与区间长度无关"""
+        total = np.zeros(len(self.brands))
+        counts = np.zeros(len(self.brands), dtype=np.int64)
+        located = self._locate(events, year_range, cohort)
+        if located is None or located[1].stop == located[1].start:
+            return total, counts
+        ci, years, event_idx = located
+        if years.stop - years.start == 1:
+            # 单一年份直接取单元，结果与 event_subset 完全一致
+            compensation = np.zeros_like(total)
+            for ei in event_idx:
+                cells, _, brands = self._cells(ci, ei, years)
+                _kahan_add(total, compensation, brands, self.pct_sums[cells])
+                counts[brands] += self.counts[cells]
+            return total, counts
+        # 多个年份：每个品牌段的区间和为两处前缀和相减，代价与区间长度无关
+        run_keys, run_starts, keys, cum_pct_sums, cum_counts = self.prefix()
+        n_years, n_brands = len(self.years), len(self.brands)
+        compensation = np.zeros_like(total)
+        for ei in event_idx:
+            block = (ci * len(self.events) + ei) * n_brands
+            runs = slice(*np.searchsorted(run_keys, [block, block + n_brands]))
+            starts, brands = run_starts[runs], run_keys[runs] - block
+            # 品牌段内年份 < lo / < hi 的最后一个单元
+            lo, hi = (np.searchsorted(keys, run_keys[runs] * n_years + y) - 1 for y in (years.start, years.stop))
+            pct_sums = np.where(hi >= starts, cum_pct_sums[hi], 0) - np.where(lo >= starts, cum_pct_sums[lo], 0)
+            in_range = np.where(hi >= starts, cum_counts[hi], 0) - np.where(lo >= starts, cum_counts[lo], 0)
+            present = in_range > 0
+            _kahan_add(total, compensation, brands[present], pct_sums[present])
+            counts[brands] += in_range
+        return total, counts
+
+    def range_means(self, events, year_range, cohort):
+        """年份区间内各品牌在赛事子集上的平均份额（与对筛选结果 groupby('brand')['share_pct'].mean() 只差末位）"""
+        pct_sums, counts = self.range_sums(events, year_range, cohort)
+        present = np.flatnonzero(counts)
+        return pd.DataFrame({
+            'brand': self.brands[present],
+            'type_zh': self.type_zh[present],
+            'share_pct': pct_sums[present] / counts[present],
+        })
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+数据集句柄：记录表 + 品牌信息 + (cohort, event, year) 分区索引 + 可加聚合立方体（+ 可选的稠密张量）
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from .bundle import read_bundle, widget_options
+from .cube import AggregateCube
+from .storage import compact_records, fingerprint, load_records, resolve_source
+from .tensor import ShareTensor
+
+PARTITION_KEYS = ['cohort', 'event', 'year']
+
+
+class PartitionIndex:
+    """(cohort, event, year) 分区索引：每个分区对应记录表中若干段连续行"""
+
+    def __init__(self, records):
+        keys = records[PARTITION_KEYS]
+        starts = np.flatnonzero(keys.ne(keys.shift()).any(axis=1).to_numpy())
+        stops = np.append(starts[1:], len(records))
+
+        runs = {}
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            cohort, event, year = keys.iloc[start]
+            runs.setdefault(cohort, {}).setdefault(event, {}).setdefault(int(year), []).append((start, stop))
+
+        # cohort -> event -> (升序年份列表, 对应的行区间列表)
+        self._partitions = {
+            cohort: {event: (sorted(years), [years[y] for y in sorted(years)]) for event, years in events.items()}
+            for cohort, events in runs.items()
+        }
+
+    def ranges(self, events, year_range, cohort):
+        """筛选条件对应的行区间，按起始位置排序并合并相邻区间"""
+        lo, hi = year_range
+        by_event = self._partitions.get(cohort, {})
+        runs = []
+        for event in events:
+            if event not in by_event:
+                continue
+            years, year_runs = by_event[event]
+            for rs in year_runs[bisect_left(years, lo):bisect_right(years, hi)]:
+                runs.extend(rs)
+        runs.sort()
+
+        merged = []
+        for start, stop in runs:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], stop)
+            else:
+                merged.append((start, stop))
+        return merged
+
+    def select(self, records, events, year_range, cohort):
+        """拼接命中的分区切片，代价只与命中行数相关；只命中一段连续行时直接返回切片（不拷贝）"""
+        ranges = self.ranges(events, year_range, cohort)
+        if not ranges:
+            return records.iloc[0:0]
+        if len(ranges) == 1:
+            return records.iloc[ranges[0][0]:ranges[0][1]]
+        positions = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+        return records.take(positions)
+
+
+@dataclass
+class Dataset:
+    """已加载的数据集"""
+    records: pd.DataFrame
+    brands: dict
+    index: PartitionIndex
+    cube: AggregateCube
+    tensor: ShareTensor = None
+    # 数据版本（数据文件内容指纹），派生缓存按版本区分
+    version: str = None
+    # 侧边栏控件选项：赛事、年份范围、队列
+    options: dict = None
+    # 穷举预计算的派生表存储（precompute.PrecomputedViews），为 None 时全部实时计算
+    precomputed: object = None
+
+    @classmethod
+    def from_records(cls, records, brands, tensor=False, version=None, cube=None, options=None):
+        """由记录表建立数据集；cube/options 已预先算好（编译产物）时直接使用"""
+        options = options or widget_options(records)
+        # 按队列稳定排序：同一队列内保持原有行序，全赛事的年份区间即为一段连续行
+        # （Arrow IPC 文件写出时已排好序，此时跳过以免拷贝映射的列）
+        if not (isinstance(records.index, pd.RangeIndex) and records.index.start == 0 and records.index.step == 1
+                and records['cohort'].is_monotonic_increasing):
+            records = records.sort_values('cohort', kind='stable').reset_index(drop=True)
+        return cls(records=records, brands=brands, index=PartitionIndex(records),
+                   cube=cube if cube is not None else AggregateCube(records),
+                   tensor=ShareTensor(records) if tensor else None, version=version, options=options)
+
+    def select(self, events, year_range, cohort):
+        """按侧边栏全局筛选条件取数据"""
+        return self.index.select(self.records, events, year_range, cohort)
+
+    def freeze(self):
+        """转为只读数据集，供进程内所有会话共享：记录表与立方体/张量数组只读，品牌信息为只读映射"""
+        for model in (self.cube, self.tensor):
+            if model is not None:
+                for value in vars(model).values():
+                    if isinstance(value, np.ndarray) and value.dtype != object:
+                        _readonly(value)
+        return replace(self, records=freeze_frame(self.records), brands=_freeze_mapping(self.brands),
+                       options=_freeze_mapping(self.options))
+
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+
+def _frozen(array):
+    return array if not array.flags.writeable else _readonly(array.copy())
+
+
+def freeze_frame(df):
+    """重建为各列独立、底层数组只读的 DataFrame（不合并为二维块，列数据不再拷贝；已只读的数组如内存映射列直接复用）"""
+    columns = {}
+    for name in df.columns:
+        values = df[name].array
+        if not isinstance(values, pd.Categorical) and df[name].dtype == object:
+            # 字符串列转为分类列（各会话共用一份字典）：pandas 无法在只读的对象数组上计算内存占用等
+            values = pd.Categorical(df[name].to_numpy())
+        if isinstance(values, pd.Categorical):
+            columns[name] = pd.Categorical.from_codes(_frozen(values.codes), dtype=values.dtype)
+        else:
+            columns[name] = _frozen(df[name].to_numpy())
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _freeze_mapping(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze_mapping(v) for k, v in value.items()})
+    return value
+
+
+def open_dataset(json_path, compact=False, tensor=False):
+    """加载数据集并建立分区索引与聚合立方体（tensor=True 时另建稠密张量）；存在与 JSON 一致的编译产物时直接使用其中的预聚合结果"""
+    # 先取指纹再读取：读取期间文件再次变化时，下一次检查会看到新的指纹
+    version = fingerprint(json_path)
+    path, fmt = resolve_source(json_path)
+    if fmt == 'bundle':
+        records, extras, cube, options, _ = read_bundle(path)
+        if compact:
+            records = compact_records(records, extras['brands'])
+        return Dataset.from_records(records, extras['brands'], tensor=tensor, version=version, cube=cube,
+                                    options=options)
+    records, extras = load_records(json_path, compact=compact)
+    return Dataset.from_records(records, extras['brands'], tensor=tensor, version=version,
+                                options=widget_options(records, extras.get('metadata')))
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+派生表层：每个筛选状态对应一个 FilterView，筛选结果与各派生表按需计算一次，供所有 Tab 复用
+"""
+
+import threading
+
+from .cache import LRUCache, nbytes
+from .metrics import brand_profile_stats, brand_stats, brand_subset, radar_scores
+from .narrative import brand_share_changes
+from .ranking import calculate_yearly_rank, rank_shares
+from .trends import TypeSeries
+
+# 名称 -> 计算函数 func(view, *args)
+_TABLES = {}
+
+
+def derived_table(func):
+    """注册派生表"""
+    _TABLES[func.__name__] = func
+    return func
+
+
+class FilterView:
+    """某一筛选状态下的数据视图，派生表只计算一次（结果只读，不可原地修改）"""
+
+    def __init__(self, dataset, state, on_grow=None, type_series=None):
+        self.dataset = dataset
+        self.state = state
+        self._on_grow = on_grow
+        # 本队列的国产/国际趋势序列：由 ViewCache 提供时按 (数据版本, 队列) 共享，否则随视图构建
+        self._type_series = type_series
+        self._tables = {}
+        # 已缓存派生表的字节数累计，派生表写入时计量一次
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        # 派生表命中/计算次数（运行诊断用）
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def frame(self):
+        """全局筛选后的记录"""
+        return self.table('frame')
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def table(self, name, *args):
+        key = (name,) + args
+        if key in self._tables:
+            self.hits += 1
+            return self._tables[key]
+        self.misses += 1
+        # 有预计算存储时先查表，未覆盖的状态或派生表实时计算
+        precomputed = self.dataset.precomputed
+        value = precomputed.lookup(self.state, name, args) if precomputed is not None else None
+        if value is None:
+            value = _TABLES[name](self, *args)
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = value
+                self._nbytes += nbytes(value)
+            value = self._tables[key]
+        if self._on_grow is not None:
+            self._on_grow()
+        return value
+
+    def type_series(self):
+        if self._type_series is None:
+            self._type_series = TypeSeries(self.dataset, self.state.cohort)
+        elif callable(self._type_series):
+            self._type_series = self._type_series()
+        return self._type_series
+
+    def brand_rows(self, brand, name, *args):
+        """派生表 name 中某个品牌的行，与按品牌布尔筛选的结果相同；按品牌分组的行位置只计算一次，查表不扫描整表"""
+        table = self.table(name, *args)
+        positions = self.table('brand_positions', name, *args).get(brand)
+        return table.iloc[positions if positions is not None else []]
+
+    def brand_profiles(self):
+        return self.table('brand_profiles')
+
+    def brand_year_means(self):
+        return self.table('brand_year_means')
+
+    def range_means(self, year_range):
+        return self.table('range_means', tuple(year_range))
+
+    def yearly_rank(self, aggregate):
+        return self.table('yearly_rank', aggregate)
+
+    def event_share_means(self):
+        return self.table('event_share_means')
+
+    def type_trend(self):
+        return self.table('type_trend')
+
+    def top10_by_type(self):
+        return self.table('top10_by_type')
+
+    def top10_totals(self):
+        return self.table('top10_totals')
+
+    def share_changes(self):
+        return self.table('share_changes')
+
+    def brand_rank_trend(self, brands):
+        return self.table('brand_rank_trend', tuple(brands))
+
+    def heatmap(self, brand):
+        return self.table('heatmap', brand)
+
+    def brand_radar(self):
+        return self.table('brand_radar')
+
+    def radar_metrics(self, brands):
+        """所选品牌的雷达图得分，按所选顺序排列，无数据的品牌略去（在全部品牌的得分表上查表）"""
+        return brand_subset(self.brand_radar(), brands).reset_index()
+
+
+def _filter_args(view):
+    state = view.state
+    return state.events, state.year_range, state.cohort
+
+
+@derived_table
+def frame(view):
+    state = view.state
+    return view.dataset.select(state.events, state.year_range, state.cohort)
+
+
+@derived_table
+def brand_positions(view, name, *args):
+    """派生表按品牌分组的行位置：品牌 -> 升序行号数组"""
+    return view.table(name, *args).groupby('brand', observed=True).indices
+
+
+@derived_table
+def brand_profiles(view):
+    """全部品牌的专题指标，品牌专题页切换品牌时只查表"""
+    return brand_profile_stats(view.frame)
+
+
+@derived_table
+def brand_year_means(view):
+    """所选赛事上每年各品牌的平均份额，由聚合立方体直接相加得到，不扫描原始记录"""
+    state = view.state
+    return view.dataset.cube.event_subset_means(state.events, state.year_range, state.cohort)
+
+
+@derived_table
+def range_means(view, year_range):
+    """所选赛事上各品牌在年份区间内的平均份额，由聚合立方体的年份前缀和相减得到"""
+    state = view.state
+    return view.dataset.cube.range_means(state.events, year_range, state.cohort)
+
+
+@derived_table
+def yearly_rank(view, aggregate):
+    if aggregate:
+        return rank_shares(view.brand_year_means()[['year', 'brand', 'type_zh', 'share']].copy(), ['year'])
+    return calculate_yearly_rank(view.frame, aggregate)
+
+
+@derived_table
+def event_share_means(view):
+    """各品牌每年在每个赛事上的平均份额，按 (year, event, brand) 排序"""
+    return view.frame.groupby(['year', 'event', 'brand'], observed=True)['share_pct'].mean().reset_index()
+
+
+@derived_table
+def type_trend(view):
+    """国产/国际品牌每年份额合计，由本队列的趋势序列按所选赛事与年份切片相加"""
+    tensor = view.dataset.tensor
+    if tensor is not None:
+        return tensor.type_sums(*_filter_args(view))
+    state = view.state
+    return view.type_series().type_trend(state.events, state.year_range)
+
+
+@derived_table
+def top10_by_type(view):
+    """国产/国际品牌每年进入 TOP10 的条目数"""
+    state = view.state
+    return view.type_series().top10_by_type(state.events, state.year_range)
+
+
+@derived_table
+def top10_totals(view):
+    """国产/国际品牌在所选年份区间内进入 TOP10 的条目总数，由趋势序列的年份前缀和相减得到"""
+    state = view.state
+    return view.type_series().top10_totals(state.events, state.year_range)
+
+
+@derived_table
+def heatmap(view, brand):
+    """单个品牌 赛事 × 年份 的平均排名"""
+    tensor = view.dataset.tensor
+    if tensor is not None:
+        return tensor.heatmap(brand, *_filter_args(view))
+    return view.brand_rows(brand, 'frame').pivot_table(values='rank', index='event', columns='year', aggfunc='mean',
+                                                       observed=True)
+
+
+@derived_table
+def brand_radar(view):
+    """全部品牌的雷达图得分（以品牌为索引），一次分组聚合得到"""
+    tensor = view.dataset.tensor
+    stats = tensor.brand_stats(*_filter_args(view)) if tensor is not None else brand_stats(view.frame)
+    return radar_scores(stats, len(view.dataset.cube.events)).set_index('brand')
+
+
+@derived_table
+def share_changes(view):
+    """全部品牌首末年份的平均份额与变化量，品牌对比的文案由此查表生成"""
+    return brand_share_changes(view.frame)
+
+
+@derived_table
+def brand_rank_trend(view, brands):
+    """指定品牌每年的平均排名；均为代表品牌时由趋势序列切片得到"""
+    series = view.type_series()
+    if series.covers(brands):
+        return series.brand_rank_trend(brands, view.state.events, view.state.year_range)
+    df = view.frame
+    return df[df['brand'].isin(brands)].groupby(['year', 'brand'], observed=True)['rank'].mean().reset_index()
+
+
+class ViewCache:
+    """按 (数据版本, 筛选状态) 缓存 FilterView，派生表增加时同步更新字节占用"""
+
+    def __init__(self, max_entries=256, max_bytes=256 * 2 ** 20):
+        self.lru = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda view: view.nbytes)
+        # (数据版本, 队列) -> 国产/国际趋势序列，同一队列的所有筛选状态共享
+        self.series = LRUCache(max_entries=64, max_bytes=max_bytes, sizeof=lambda series: series.nbytes)
+
+    def view(self, dataset, state):
+        key = (dataset.version, state)
+        return self.lru.get_or_compute(
+            key, lambda: FilterView(dataset, state, on_grow=lambda: self.lru.resize(key),
+                                    type_series=lambda: self.type_series(dataset, state.cohort)))
+
+    def type_series(self, dataset, cohort):
+        return self.series.get_or_compute((dataset.version, cohort), lambda: TypeSeries(dataset, cohort))
+
+    def clear(self):
+        self.lru.clear()
+        self.series.clear()
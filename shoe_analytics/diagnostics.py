@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+运行诊断：会话内各区块与图表（构建 + 输出）的耗时、重跑次数、缓存命中率与 Plotly 图表载荷大小（跨重跑累计）
+"""
+
+import functools
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+
+class Diagnostics:
+    """会话级诊断数据，各项在会话内的所有重跑上累计"""
+
+    def __init__(self):
+        self.reruns = 0
+        # 区块名 -> [次数, 总耗时, 最近耗时, 最大耗时]（秒）
+        self.sections = {}
+        # 图表名 -> [次数, 总耗时, 最近耗时]（秒，从开始构建图表到输出完成）
+        self.figures = {}
+        # 图表名 -> 最近一次输出的 Plotly 图，载荷大小只在需要时序列化计算
+        self._latest = {}
+        self._chart = None
+        # 缓存名 -> [命中, 未命中]
+        self.caches = {}
+
+    def begin_rerun(self):
+        self.reruns += 1
+
+    def _record(self, name, seconds):
+        stat = self.sections.setdefault(name, [0, 0.0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = seconds
+        stat[3] = max(stat[3], seconds)
+
+    @contextmanager
+    def section(self, name):
+        """记录代码块的墙钟耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """函数装饰器：每次调用记为一次区块耗时"""
+        def decorate(func):
+            @functools.wraps(func)
+            def run(*args, **kwargs):
+                with self.section(name):
+                    return func(*args, **kwargs)
+            return run
+        return decorate
+
+    @contextmanager
+    def chart(self, name):
+        """记录一张图表从开始构建到输出完成的耗时；块内输出的图由 figure() 登记"""
+        start = time.perf_counter()
+        self._chart = name
+        try:
+            yield
+        finally:
+            self._chart = None
+            seconds = time.perf_counter() - start
+            stat = self.figures.setdefault(name, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = seconds
+
+    def figure(self, fig):
+        """登记当前 chart 块输出的 Plotly 图（每个图表只保留最近一次）"""
+        if self._chart is not None:
+            self._latest[self._chart] = fig
+
+    def count(self, name, hits, misses):
+        """累加缓存命中/未命中次数"""
+        stat = self.caches.setdefault(name, [0, 0])
+        stat[0] += hits
+        stat[1] += misses
+
+    def section_table(self):
+        rows = [{'区块': name, '次数': n, '平均(ms)': total / n * 1000, '最近(ms)': last * 1000, '最大(ms)': peak * 1000}
+                for name, (n, total, last, peak) in self.sections.items()]
+        return pd.DataFrame(rows, columns=['区块', '次数', '平均(ms)', '最近(ms)', '最大(ms)'])
+
+    def figure_table(self, payload=False):
+        """各图表的耗时；payload=True 时另把最近一次输出的图序列化，给出载荷大小"""
+        columns = ['图表', '次数', '平均(ms)', '最近(ms)'] + (['最近载荷(KB)'] if payload else [])
+        rows = []
+        for name, (n, total, last) in self.figures.items():
+            row = {'图表': name, '次数': n, '平均(ms)': total / n * 1000, '最近(ms)': last * 1000}
+            if payload:
+                fig = self._latest.get(name)
+                row['最近载荷(KB)'] = len(fig.to_json().encode('utf-8')) / 1024 if fig is not None else float('nan')
+            rows.append(row)
+        return pd.DataFrame(rows, columns=columns)
+
+    def cache_table(self):
+        rows = [{'缓存': name, '命中': hits, '未命中': misses,
+                 '命中率': hits / (hits + misses) if hits + misses else float('nan')}
+                for name, (hits, misses) in self.caches.items()]
+        return pd.DataFrame(rows, columns=['缓存', '命中', '未命中', '命中率'])
+
+
+class NullDiagnostics:
+    """关闭诊断时使用：接口相同，不做任何记录"""
+
+    reruns = 0
+
+    def begin_rerun(self):
+        pass
+
+    def section(self, name):
+        return nullcontext()
+
+    def timed(self, name):
+        return lambda func: func
+
+    def chart(self, name):
+        return nullcontext()
+
+    def figure(self, fig):
+        pass
+
+    def count(self, name, hits, misses):
+        pass
+
+
+NULL_DIAGNOSTICS = NullDiagnostics()
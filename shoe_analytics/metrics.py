@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+品牌综合指标：雷达图各维度得分
+"""
+
+import numpy as np
+import pandas as pd
+
+RADAR_DIMENSIONS = ['排名得分', '份额得分', '最佳表现', '稳定性', '赛事覆盖']
+
+
+def _at_most(values, upper):
+    # 与 min(upper, x) 相同：x 为 NaN 时取 upper
+    return np.where(values < upper, values, upper)
+
+
+def _at_least(values, lower):
+    # 与 max(lower, x) 相同
+    return np.where(values > lower, values, lower)
+
+
+def radar_scores(stats, total_events):
+    """由品牌统计量（rank_mean / share_pct_mean / rank_min / rank_std / event_count）计算雷达图得分"""
+    return pd.DataFrame({
+        'brand': stats.index,
+        '排名得分': _at_least(_at_most(100 - stats['rank_mean'].to_numpy(dtype=float) * 5, 100), 0),
+        '份额得分': _at_most(stats['share_pct_mean'].to_numpy(dtype=float) * 5, 100),
+        '最佳表现': _at_least(_at_most(100 - stats['rank_min'].to_numpy(dtype=float) * 8, 100), 0),
+        '稳定性': _at_least(_at_most(100 - stats['rank_std'].to_numpy(dtype=float) * 5, 100), 0),
+        '赛事覆盖': stats['event_count'].to_numpy(dtype=float) / total_events * 100,
+    })
+
+
+def brand_stats(data, brands=None):
+    """各品牌的排名/份额统计，一次分组聚合得到全部品牌；指定 brands 时按其顺序取子集，无数据的品牌略去"""
+    grouped = data.groupby('brand', observed=True)
+    stats = pd.DataFrame({
+        'rank_mean': grouped['rank'].mean(),
+        'share_pct_mean': grouped['share_pct'].mean(),
+        'rank_min': grouped['rank'].min(),
+        'rank_std': grouped['rank'].std(),
+        'event_count': grouped['event'].nunique(),
+    })
+    return stats if brands is None else brand_subset(stats, brands)
+
+
+def first_last_years(yearly):
+    """按 (brand, year) 排序的品牌年度表中各品牌首年与末年的行，返回 (首年, 末年)，均以品牌为索引"""
+    first = yearly[~yearly['brand'].duplicated(keep='first')].set_index('brand')
+    last = yearly[~yearly['brand'].duplicated(keep='last')].set_index('brand')
+    return first, last
+
+
+def brand_profile_stats(data):
+    """全部品牌的专题指标（以品牌为索引），一次分组聚合得到：最佳/最差排名及其赛事与年份、平均排名与份额、首末年份的年度平均排名"""
+    grouped = data.groupby('brand', observed=True)
+    # 与逐品牌 idxmin/idxmax 相同：并列时取筛选结果中最先出现的记录
+    best = data.loc[grouped['rank'].idxmin().to_numpy()].set_index('brand')
+    worst = data.loc[grouped['rank'].idxmax().to_numpy()].set_index('brand')
+    yearly = data.groupby(['brand', 'year'], observed=True)['rank'].mean().reset_index()
+    first, last = first_last_years(yearly)
+    return pd.DataFrame({
+        'records': grouped.size(),
+        'best_rank': best['rank'],
+        'best_event': best['event'],
+        'best_year': best['year'],
+        'worst_rank': worst['rank'],
+        'worst_event': worst['event'],
+        'worst_year': worst['year'],
+        'rank_mean': grouped['rank'].mean(),
+        'share_pct_mean': grouped['share_pct'].mean(),
+        'years': yearly.groupby('brand', observed=True).size(),
+        'start_rank': first['rank'],
+        'end_rank': last['rank'],
+    })
+
+
+def brand_subset(stats, brands):
+    """按品牌索引取子集，保持 brands 的顺序，略去不在索引中的品牌"""
+    positions = stats.index.get_indexer(list(brands))
+    return stats.iloc[positions[positions >= 0]]
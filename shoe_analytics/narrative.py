@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+分析文案：由品牌记录生成趋势描述
+"""
+
+import numpy as np
+import pandas as pd
+
+from .metrics import first_last_years
+
+
+def yearly_means(brand_data):
+    """品牌每年的平均份额与平均排名，按年份排序"""
+    return brand_data.groupby('year', observed=True).agg({'share_pct': 'mean', 'rank': 'mean'}).reset_index() \
+        .sort_values('year')
+
+
+def share_change_text(brand_name, start_share, end_share, start_year, end_year):
+    """首末年份平均份额的变化文案"""
+    share_change = end_share - start_share
+    pct_change = (share_change / start_share * 100) if start_share > 0 else 0
+
+    if share_change > 0:
+        direction = "上升"
+        icon = "📈"
+    elif share_change < 0:
+        direction = "下降"
+        icon = "📉"
+    else:
+        direction = "持平"
+        icon = "➡️"
+
+    return f"{icon} **{brand_name}**：份额从 {start_share:.1f}%（{start_year}）→ {end_share:.1f}%（{end_year}），{direction}{abs(share_change):.1f}个百分点（{'+' if pct_change > 0 else ''}{pct_change:.1f}%）"
+
+
+def insufficient_text(brand_name):
+    return f"**{brand_name}**：数据不足，无法生成趋势分析。"
+
+
+def generate_dynamic_analysis(brand_data, brand_name):
+    """动态生成品牌分析文案"""
+    if len(brand_data) < 2:
+        return insufficient_text(brand_name)
+
+    yearly = yearly_means(brand_data)
+    start_share = yearly.iloc[0]['share_pct']
+    end_share = yearly.iloc[-1]['share_pct']
+    start_year = int(yearly.iloc[0]['year'])
+    end_year = int(yearly.iloc[-1]['year'])
+    return share_change_text(brand_name, start_share, end_share, start_year, end_year)
+
+
+def brand_share_changes(data):
+    """全部品牌首末年份的平均份额与变化量（以品牌为索引），一次分组聚合得到；records 为品牌的记录数"""
+    yearly = data.groupby(['brand', 'year'], observed=True)['share_pct'].mean().reset_index()
+    # 与逐品牌计算一致：年度均值按 float64 参与首末年份的差值
+    yearly['share_pct'] = yearly['share_pct'].astype(float)
+    first, last = first_last_years(yearly)
+    change = last['share_pct'] - first['share_pct']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_change = np.where(first['share_pct'] > 0, change / first['share_pct'] * 100, 0)
+    return pd.DataFrame({
+        'records': data.groupby('brand', observed=True).size(),
+        'start_year': first['year'].astype(int),
+        'end_year': last['year'].astype(int),
+        'start_share': first['share_pct'],
+        'end_share': last['share_pct'],
+        'change': change,
+        'pct_change': pct_change,
+    })
+
+
+def share_change_narratives(changes, brands):
+    """由 brand_share_changes 表逐个查出所选品牌的文案，按所选顺序"""
+    texts = []
+    for brand in brands:
+        if brand not in changes.index or changes.at[brand, 'records'] < 2:
+            texts.append(insufficient_text(brand))
+            continue
+        row = changes.loc[brand]
+        texts.append(share_change_text(brand, row['start_share'], row['end_share'], int(row['start_year']),
+                                       int(row['end_year'])))
+    return texts
+
+
+def rank_change_analysis(brand_data):
+    """首末年份平均排名的变化，返回 (语气, 文案)；语气为 warning / success / insight，不足两年时返回 None"""
+    yearly = yearly_means(brand_data)
+    if len(yearly) < 2:
+        return None
+    return rank_change_text(yearly.iloc[0]['rank'], yearly.iloc[-1]['rank'])
+
+
+def rank_change_text(start_rank, end_rank):
+    """首末年份平均排名的变化文案，返回 (语气, 文案)"""
+    rank_change = end_rank - start_rank
+
+    if rank_change > 0:
+        return 'warning', f"排名从第{start_rank:.0f}名下滑至第{end_rank:.0f}名，下降了{rank_change:.0f}个位次"
+    if rank_change < 0:
+        return 'success', f"排名从第{start_rank:.0f}名上升至第{end_rank:.0f}名，提升了{abs(rank_change):.0f}个位次"
+    return 'insight', f"排名保持在第{end_rank:.0f}名左右，相对稳定"
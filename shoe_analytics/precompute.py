@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+穷举预计算：离线物化所有侧边栏筛选组合下各 Tab 的派生表，运行时按筛选状态查表，未覆盖的状态回退实时计算
+"""
+
+import json
+import os
+import shutil
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .cache import FilterState
+from .dataset import Dataset
+from .derived import FilterView
+from .ranking import rank_shares
+from .storage import columnar_path, file_digest, prepare_records, read_json, replace_directory
+from .trends import TOP10_TYPES
+
+# 预计算存储目录格式版本，不兼容的改动时递增
+VIEWS_FORMAT = 5
+VIEWS_SUFFIX = '.views'
+VIEWS_MANIFEST = 'manifest.json'
+
+
+def _rank_cells(view):
+    # 各品牌 赛事 × 年份 的排名和与条目数（可加），查表时还原为热力图矩阵或跨赛事的年度平均排名
+    return view.frame.groupby(['brand', 'event', 'year'], observed=True)['rank'].agg(rank_sum='sum', count='size') \
+        .reset_index()
+
+
+# 逐状态物化的基础表：名称 -> func(view, 全部品牌)；带品牌参数的派生表存全部品牌的结果，查表时再取子集
+BASE_TABLES = {
+    'brand_year_means': lambda view, brands: view.brand_year_means(),
+    'range_means': lambda view, brands: view.range_means(view.state.year_range),
+    'type_trend': lambda view, brands: view.type_trend(),
+    'top10_by_type': lambda view, brands: view.top10_by_type(),
+    'brand_radar': lambda view, brands: view.brand_radar().reset_index(),
+    'share_changes': lambda view, brands: view.share_changes().reset_index(),
+    'brand_profiles': lambda view, brands: view.brand_profiles().reset_index(),
+}
+
+# 单元级的基础表：每行只取决于 (队列, 赛事, 年份) 分区内的记录，与所选赛事子集、年份区间无关，
+# 每个队列只物化一次（全部赛事与年份），查表时按所选赛事与年份取行
+COHORT_TABLES = {
+    'yearly_rank_by_event': lambda view: view.yearly_rank(False),
+    'event_share_means': lambda view: view.event_share_means(),
+    'rank_cells': _rank_cells,
+}
+
+# 不物化的派生表：筛选结果本身，以及只对其他派生表分组、不读取记录的品牌行位置
+LIVE_TABLES = {'frame', 'brand_positions'}
+
+
+def iter_states(options):
+    """侧边栏可产生的全部筛选状态（赛事非空子集 × 年份区间 × 队列）"""
+    events = sorted(options['events'])
+    lo, hi = options['years']
+    for cohort in options['cohorts']:
+        for n in range(1, len(events) + 1):
+            for subset in combinations(events, n):
+                for start in range(lo, hi + 1):
+                    for stop in range(start, hi + 1):
+                        yield FilterState(subset, (start, stop), cohort)
+
+
+def _plain(df):
+    # 分类列转为普通对象列，不同状态的结果可直接拼接
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def _narrow(values):
+    # 能容纳全部取值的最小有符号整型
+    lo, hi = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= lo and hi <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values
+
+
+def _encode(df):
+    """写出用的 Arrow 表：字符串列字典编码，整数列收窄；返回 (表, 各列原 pandas 类型)"""
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype == object:
+            array = pa.array(values)
+            columns[name] = array.dictionary_encode() if pa.types.is_string(array.type) else array
+        elif values.dtype.kind in 'iu':
+            columns[name] = pa.array(_narrow(values))
+        else:
+            columns[name] = pa.array(values)
+    return pa.table(columns), {name: str(dtype) for name, dtype in df.dtypes.items()}
+
+
+def _write_table(directory, name, frames):
+    # 原索引存为普通列，同一键（状态或队列）的行连续存放，查表时按 _key 切片
+    table = pd.concat(frames)
+    table.insert(len(table.columns), '_index', table.index.to_numpy())
+    table, dtypes = _encode(table.reset_index(drop=True))
+    del dtypes['_key']
+    with pa.OSFile(os.path.join(directory, f"{name}.arrow"), 'wb') as sink, \
+            pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return table.num_rows, dtypes
+
+
+def build_views(json_path, output=None):
+    """对 JSON 数据穷举所有筛选状态并写出预计算存储目录，返回清单"""
+    records, extras = read_json(json_path)
+    dataset = Dataset.from_records(prepare_records(records), extras['brands'])
+    brands = tuple(dataset.cube.brands)
+    states = list(iter_states(dataset.options))
+    cohorts = list(dataset.options['cohorts'])
+
+    chunks = {name: [] for name in {**BASE_TABLES, **COHORT_TABLES}}
+    for state_id, state in enumerate(states):
+        view = FilterView(dataset, state)
+        for name, compute in BASE_TABLES.items():
+            chunks[name].append(_plain(compute(view, brands)).assign(_key=state_id))
+    for cohort_id, cohort in enumerate(cohorts):
+        view = FilterView(dataset, FilterState(tuple(sorted(dataset.options['events'])),
+                                               tuple(dataset.options['years']), cohort))
+        for name, compute in COHORT_TABLES.items():
+            chunks[name].append(_plain(compute(view)).assign(_key=cohort_id))
+
+    output = output or columnar_path(json_path, VIEWS_SUFFIX)
+    tmp_dir = f"{output}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        rows, dtypes = {}, {}
+        for name, frames in chunks.items():
+            rows[name], dtypes[name] = _write_table(tmp_dir, name, frames)
+        manifest = {
+            'format': VIEWS_FORMAT,
+            'source': {'path': os.path.basename(json_path), 'digest': file_digest(json_path)},
+            'brands': [str(b) for b in brands],
+            'cohorts': cohorts,
+            'states': [[list(s.events), s.year_range[0], s.year_range[1], s.cohort] for s in states],
+            'rows': rows,
+            'dtypes': dtypes,
+        }
+        with open(os.path.join(tmp_dir, VIEWS_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        replace_directory(tmp_dir, output)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+def _read_manifest(path):
+    with open(os.path.join(path, VIEWS_MANIFEST), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class PrecomputedViews:
+    """预计算存储：各基础表内存映射读取，逐状态的表按筛选状态切片，单元级的表按队列切片后再按赛事与年份取行"""
+
+    def __init__(self, path, manifest=None):
+        manifest = manifest or _read_manifest(path)
+        if manifest.get('format') != VIEWS_FORMAT:
+            raise ValueError(f"{path} 的格式 {manifest.get('format')} 与当前版本 {VIEWS_FORMAT} 不兼容，请重新生成")
+        self.path = path
+        self.digest = manifest['source']['digest']
+        self.brands = manifest['brands']
+        self._state_list = [FilterState(tuple(events), (lo, hi), cohort)
+                            for events, lo, hi, cohort in manifest['states']]
+        self._states = {state: i for i, state in enumerate(self._state_list)}
+        self._cohorts = {cohort: i for i, cohort in enumerate(manifest['cohorts'])}
+        self._dtypes = manifest['dtypes']
+        self._tables = {}
+        for names, keys in ((BASE_TABLES, len(self._states)), (COHORT_TABLES, len(self._cohorts))):
+            for name in names:
+                table = pa.ipc.open_file(pa.memory_map(os.path.join(path, f"{name}.arrow"), 'r')).read_all()
+                offsets = np.searchsorted(table.column('_key').to_numpy(), np.arange(keys + 1))
+                self._tables[name] = (table.drop_columns(['_key']), offsets)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._states)
+
+    def _slice(self, name, key):
+        # 某个键（状态或队列）的行，还原各列类型与原索引
+        table, offsets = self._tables[name]
+        start, stop = offsets[key], offsets[key + 1]
+        df = table.slice(start, stop - start).to_pandas().astype(self._dtypes[name])
+        index = df.pop('_index').to_numpy()
+        df.index = pd.RangeIndex(len(df)) if np.array_equal(index, np.arange(len(df))) else pd.Index(index)
+        return df
+
+    def base(self, state_id, name):
+        """某状态下的逐状态基础表"""
+        return self._slice(name, state_id)
+
+    def cells(self, state_id, name):
+        """某状态下的单元级基础表：所在队列的行中属于所选赛事与年份区间的部分（保持原有行序）"""
+        state = self._state_list[state_id]
+        df = self._slice(name, self._cohorts[state.cohort])
+        keep = df['event'].isin(state.events) & df['year'].between(*state.year_range)
+        return df[keep.to_numpy()].reset_index(drop=True)
+
+    def state(self, state_id):
+        return self._state_list[state_id]
+
+    def lookup(self, state, name, args):
+        """查表得到派生表；状态或派生表未被预计算覆盖时返回 None"""
+        state_id = self._states.get(state)
+        resolve = _RESOLVERS.get(name)
+        value = None if state_id is None or resolve is None else resolve(self, state_id, *args)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+
+def _brand_subset(df, brands):
+    return df[df['brand'].isin(brands)].reset_index(drop=True)
+
+
+def _yearly_rank(store, state_id, aggregate):
+    if not aggregate:
+        return store.cells(state_id, 'yearly_rank_by_event')
+    # 与实时计算相同：对各年平均份额做年度排名
+    return rank_shares(store.base(state_id, 'brand_year_means')[['year', 'brand', 'type_zh', 'share']].copy(), ['year'])
+
+
+def _range_means(store, state_id, year_range):
+    # 单一年份取该年的平均份额（与实时计算同一路径，结果相同），整个筛选区间取预计算结果，其他区间实时计算
+    if year_range[0] == year_range[1]:
+        means = store.base(state_id, 'brand_year_means')
+        return means[means['year'] == year_range[0]][['brand', 'type_zh', 'share_pct']].reset_index(drop=True)
+    if tuple(year_range) == store.state(state_id).year_range:
+        return store.base(state_id, 'range_means')
+    return None
+
+
+def _top10_totals(store, state_id):
+    # 区间内的 TOP10 条目总数与有条目的年数，由逐年的 TOP10 条目数表相加得到
+    counts = store.base(state_id, 'top10_by_type').groupby('type_zh')['count'].agg(['sum', 'size'])
+    counts = counts.reindex(TOP10_TYPES, fill_value=0).astype(np.int64)
+    return pd.DataFrame({'count': counts['sum'].to_numpy(), 'years': counts['size'].to_numpy()},
+                        index=pd.Index(TOP10_TYPES, name='type_zh'))
+
+
+def _brand_rank_trend(store, state_id, brands):
+    cells = store.cells(state_id, 'rank_cells')
+    cells = cells[cells['brand'].isin(brands)].groupby(['year', 'brand'])[['rank_sum', 'count']].sum()
+    # 排名为整数，和与条目数精确，均值与逐条记录求平均相同
+    return (cells['rank_sum'] / cells['count']).rename('rank').reset_index()
+
+
+def _heatmap(store, state_id, brand):
+    cells = store.cells(state_id, 'rank_cells')
+    cells = cells[cells['brand'] == brand]
+    if cells.empty:
+        return None
+    return cells.assign(rank=cells['rank_sum'] / cells['count']).pivot(index='event', columns='year', values='rank')
+
+
+# 派生表名 -> resolve(store, state_id, *args)
+_RESOLVERS = {
+    'brand_year_means': lambda store, sid: store.base(sid, 'brand_year_means'),
+    'range_means': _range_means,
+    'yearly_rank': _yearly_rank,
+    'event_share_means': lambda store, sid: store.cells(sid, 'event_share_means'),
+    'type_trend': lambda store, sid: store.base(sid, 'type_trend'),
+    'top10_by_type': lambda store, sid: store.base(sid, 'top10_by_type'),
+    'top10_totals': _top10_totals,
+    'brand_rank_trend': _brand_rank_trend,
+    'brand_radar': lambda store, sid: store.base(sid, 'brand_radar').set_index('brand'),
+    'share_changes': lambda store, sid: store.base(sid, 'share_changes').set_index('brand'),
+    'brand_profiles': lambda store, sid: store.base(sid, 'brand_profiles').set_index('brand'),
+    'heatmap': _heatmap,
+}
+
+
+def open_views(json_path):
+    """打开与当前 JSON 一致的预计算存储；不存在或已过期时返回 None（全部实时计算）"""
+    path = columnar_path(json_path, VIEWS_SUFFIX)
+    if not os.path.exists(os.path.join(path, VIEWS_MANIFEST)) or not os.path.exists(json_path):
+        return None
+    # 先核对清单中的源哈希，过期的存储不做内存映射
+    manifest = _read_manifest(path)
+    return PrecomputedViews(path, manifest) if manifest['source']['digest'] == file_digest(json_path) else None
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+重跑剖析：用 cProfile（pstats 文件）或 pyinstrument（火焰图 HTML）包住一次脚本重跑，按侧边栏状态命名写到本地目录
+"""
+
+import cProfile
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from .storage import replace_file
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+def state_tag(state):
+    """侧边栏状态的文件名标签：队列、年份区间、赛事数与赛事集合的短哈希"""
+    events = hashlib.blake2b('\n'.join(state.events).encode('utf-8'), digest_size=4).hexdigest()
+    cohort = re.sub(r'[\\/:*?"<>|\s]+', '_', state.cohort)
+    return f"{cohort}-{state.year_range[0]}-{state.year_range[1]}-{len(state.events)}ev-{events}"
+
+
+def _write_text(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+class RerunProfiler:
+    """一次重跑的剖析器：start() 开始采集，stop(state) 停止并写出结果文件与同名 JSON 说明"""
+
+    def __init__(self, directory, kind='cprofile'):
+        if kind not in PROFILERS:
+            raise ValueError(f"未知的剖析器: {kind}（可选 {', '.join(PROFILERS)}）")
+        self.directory = directory
+        self.kind = kind
+        self._profiler = None
+        self._started = None
+
+    def start(self):
+        """开始剖析；本线程已有其他剖析器在运行时跳过并返回 False"""
+        try:
+            if self.kind == 'pyinstrument':
+                # 可选依赖，只在选用火焰图时导入
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+                self._profiler.start()
+            else:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+        except (ValueError, RuntimeError):
+            # Python 3.12 起 cProfile 占用进程级的监控槽位，并发会话在此跳过本次剖析
+            self._profiler = None
+            return False
+        self._started = time.perf_counter()
+        return True
+
+    def _halt(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def abort(self):
+        """停止剖析、不写文件（重跑被中断时调用）"""
+        if self._profiler is not None:
+            self._halt()
+            self._profiler = None
+
+    def stop(self, state, **info):
+        """停止剖析并写出文件，返回结果文件路径（未在剖析时返回 None）"""
+        if self._profiler is None:
+            return None
+        self._halt()
+        seconds = time.perf_counter() - self._started
+        if self.kind == 'pyinstrument':
+            html = self._profiler.output_html()
+            suffix, write = '.html', lambda tmp: _write_text(tmp, html)
+        else:
+            suffix, write = '.pstats', self._profiler.dump_stats
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"rerun-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{state_tag(state)}"
+        path = os.path.join(self.directory, name + suffix)
+        replace_file(path, write)
+        meta = {
+            'profiler': self.kind,
+            'seconds': seconds,
+            'events': list(state.events),
+            'year_range': list(state.year_range),
+            'cohort': state.cohort,
+            **info,
+        }
+        _write_text(os.path.join(self.directory, name + '.json'), json.dumps(meta, ensure_ascii=False, indent=2))
+        self._profiler = None
+        return path
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+排名计算
+"""
+
+
+def rank_shares(yearly, groups):
+    """在各组内按份额降序排名（并列取最小名次），就地添加 rank 列"""
+    # groupby().rank() 在各组内一次性向量化排名，无需逐组回调与拷贝
+    yearly['rank'] = yearly.groupby(groups, observed=True)['share'].rank(ascending=False, method='min').astype(int)
+    return yearly
+
+
+def calculate_yearly_rank(data, aggregate=True):
+    """计算每年品牌排名（聚合模式按年排名，否则按年+赛事排名）"""
+    if aggregate:
+        keys, groups = ['year', 'brand', 'type_zh'], ['year']
+    else:
+        keys, groups = ['year', 'event', 'brand', 'type_zh'], ['year', 'event']
+
+    yearly = data.groupby(keys, observed=True)['share'].mean().reset_index()
+    return rank_shares(yearly, groups)
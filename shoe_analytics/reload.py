@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+数据集热加载：按数据文件内容指纹检测新版本，后台线程加载后原子替换，正在运行的会话继续使用旧版本
+"""
+
+import threading
+import time
+import traceback
+
+from .storage import fingerprint
+
+
+class DatasetStore:
+    """持有当前版本的数据集；数据文件变化时在后台加载新版本，加载完成后一次性替换"""
+
+    def __init__(self, json_path, load, interval=5, on_swap=None):
+        self.json_path = json_path
+        self.interval = interval
+        self._load = load
+        self._on_swap = on_swap
+        self._lock = threading.Lock()
+        # 首次加载同步进行
+        self._current = load()
+        self._checked = time.monotonic()
+        self._pending = None
+        self._failed = None
+        self.reloads = 0
+        self.last_error = None
+        # current() 调用次数与加载次数（运行诊断用）
+        self.requests = 0
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @property
+    def loads(self):
+        return 1 + self.reloads
+
+    def current(self):
+        """当前版本的数据集；距上次检查超过 interval 秒时顺带检查数据文件（interval < 0 时不检查）"""
+        self.requests += 1
+        now = time.monotonic()
+        if self.interval >= 0 and now - self._checked >= self.interval:
+            self._checked = now
+            self.refresh()
+        # 调用方在整个重跑期间持有返回的对象，后续替换不影响它
+        return self._current
+
+    def refresh(self, wait=False):
+        """数据文件指纹与当前版本不同时启动后台加载，返回加载线程（无需加载时返回 None）"""
+        try:
+            version = fingerprint(self.json_path)
+        except OSError:
+            # 文件正被替换或暂时缺失，下次检查再试
+            return None
+        with self._lock:
+            if version in (self._current.version, self._pending, self._failed):
+                return None
+            self._pending = version
+            thread = threading.Thread(target=self._reload, args=(version,), name='dataset-reload', daemon=True)
+            thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def _reload(self, version):
+        try:
+            dataset = self._load()
+        except Exception:
+            # 新文件不完整或无法解析：继续使用旧版本，直到文件再次变化
+            with self._lock:
+                self._pending = None
+                self._failed = version
+                self.last_error = traceback.format_exc()
+            return
+        with self._lock:
+            previous, self._current = self._current, dataset
+            self._pending = None
+            self._failed = None
+            self.last_error = None
+            self.reloads += 1
+        if self._on_swap is not None:
+            self._on_swap(previous, dataset)
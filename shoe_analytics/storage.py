@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+数据存储：JSON 原始数据、列式（Parquet）记录表与可内存映射的 Arrow IPC 记录表的读写，数据来源的选择与指纹
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 记录表的列式 schema，写入与读取时都按此校验
+RECORD_SCHEMA = pa.schema([
+    pa.field('year', pa.int32(), nullable=False),
+    pa.field('event', pa.string(), nullable=False),
+    pa.field('cohort', pa.string(), nullable=False),
+    pa.field('brand', pa.string(), nullable=False),
+    pa.field('brand_type', pa.string(), nullable=False),
+    pa.field('rank', pa.int32(), nullable=False),
+    pa.field('share', pa.float64(), nullable=False),
+])
+
+# Arrow IPC 文件保存的是已补充派生列的记录表：数值列可直接引用映射页，字符串列字典编码
+_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+ARROW_SCHEMA = pa.schema([
+    pa.field('year', pa.int64(), nullable=False),
+    pa.field('event', _DICTIONARY, nullable=False),
+    pa.field('cohort', _DICTIONARY, nullable=False),
+    pa.field('brand', _DICTIONARY, nullable=False),
+    pa.field('brand_type', _DICTIONARY, nullable=False),
+    pa.field('rank', pa.int64(), nullable=False),
+    pa.field('share', pa.float64(), nullable=False),
+    pa.field('share_pct', pa.float64(), nullable=False),
+    pa.field('type_zh', _DICTIONARY, nullable=False),
+])
+
+# 数据集编译产物（python -m shoe_analytics compile）：目录，内含清单与可内存映射的记录表
+BUNDLE_SUFFIX = '.bundle'
+BUNDLE_MANIFEST = 'manifest.json'
+BUNDLE_RECORDS = 'records.arrow'
+
+TYPE_ZH = {'domestic': '国产', 'international': '国际', 'other': '其他'}
+
+# brands / sources / metadata 等非表格字段以 JSON 形式存放在 schema 元数据中
+_EXTRAS_KEY = b'marathon_shoe_data.extras'
+
+
+def read_json(path):
+    """读取原始 JSON，返回 (记录表, 其余字段)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    records = pd.DataFrame(data.pop('records'))
+    return records, data
+
+
+def _with_extras(table, extras):
+    return table.replace_schema_metadata({_EXTRAS_KEY: json.dumps(extras, ensure_ascii=False).encode('utf-8')})
+
+
+def replace_file(path, write):
+    """write(临时路径) 写出完整文件后原子替换 path：正在读取（或已映射）旧文件的进程不受影响"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def replace_directory(new_dir, path):
+    """用已写好的目录替换 path：新目录就位后再删除旧目录，已内存映射旧文件的进程不受影响"""
+    old_dir = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_dir)
+    os.replace(new_dir, path)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def write_parquet(records, extras, path):
+    """按 RECORD_SCHEMA 写出列式记录表"""
+    columns = [field.name for field in RECORD_SCHEMA]
+    table = _with_extras(pa.Table.from_pandas(records[columns], schema=RECORD_SCHEMA, preserve_index=False), extras)
+    replace_file(path, lambda tmp: pq.write_table(table, tmp))
+
+
+def read_parquet(path):
+    """一次性批量读取列式记录表，返回 (记录表, 其余字段)"""
+    table = pq.read_table(path)
+    if not table.schema.equals(RECORD_SCHEMA, check_metadata=False):
+        raise ValueError(f"{path} 的 schema 与 RECORD_SCHEMA 不一致：\n{table.schema}")
+    extras = json.loads(table.schema.metadata[_EXTRAS_KEY].decode('utf-8'))
+    return table.to_pandas(), extras
+
+
+def write_arrow(records, extras, path):
+    """写出可内存映射的 Arrow IPC 记录表（已补充派生列，按队列稳定排序，字符串列按字典序编码）"""
+    df = prepare_records(records.copy()).sort_values('cohort', kind='stable')
+    columns = {}
+    for field in ARROW_SCHEMA:
+        values = df[field.name]
+        if pa.types.is_dictionary(field.type):
+            values = pd.Categorical(values.astype(str), categories=sorted(values.astype(str).unique()))
+        columns[field.name] = values
+    table = _with_extras(pa.Table.from_pandas(pd.DataFrame(columns), schema=ARROW_SCHEMA, preserve_index=False),
+                         extras)
+
+    def write(tmp):
+        with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    replace_file(path, write)
+
+
+def read_arrow(path):
+    """内存映射读取 Arrow IPC 记录表：数值列直接引用映射页，同一主机上的多个进程共享同一份物理内存"""
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if not table.schema.equals(ARROW_SCHEMA, check_metadata=False):
+        raise ValueError(f"{path} 的 schema 与 ARROW_SCHEMA 不一致：\n{table.schema}")
+    extras = json.loads(table.schema.metadata[_EXTRAS_KEY].decode('utf-8'))
+    # split_blocks 让每列单独成块，无空值的数值列不再拷贝
+    return table.to_pandas(split_blocks=True), extras
+
+
+def columnar_path(json_path, suffix='.parquet'):
+    """JSON 数据文件对应的列式文件路径"""
+    return os.path.splitext(json_path)[0] + suffix
+
+
+def resolve_source(json_path):
+    """选择实际读取的数据来源：与 JSON 一致的编译产物 > 不旧于 JSON 的 Arrow IPC > Parquet > JSON，返回 (路径, 格式)"""
+    bundle = columnar_path(json_path, BUNDLE_SUFFIX)
+    if bundle_is_fresh(bundle, json_path):
+        return bundle, 'bundle'
+    json_mtime = os.path.getmtime(json_path) if os.path.exists(json_path) else None
+    for fmt, suffix in (('arrow', '.arrow'), ('parquet', '.parquet')):
+        path = columnar_path(json_path, suffix)
+        if os.path.exists(path) and (json_mtime is None or os.path.getmtime(path) >= json_mtime):
+            return path, fmt
+    return json_path, 'json'
+
+
+def bundle_is_fresh(bundle, json_path):
+    """编译产物存在，且记录的源文件哈希与当前 JSON 一致（JSON 不存在时直接使用产物）"""
+    manifest_path = os.path.join(bundle, BUNDLE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return False
+    if not os.path.exists(json_path):
+        return True
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest.get('source', {}).get('digest') == file_digest(json_path)
+
+
+def prepare_records(records):
+    """补充派生列并统一类型"""
+    df = records
+    df['share_pct'] = df['share'] * 100
+    df['year'] = df['year'].astype(int)
+    df['rank'] = df['rank'].astype(int)
+    df['type_zh'] = df['brand_type'].map(TYPE_ZH)
+    return df
+
+
+def compact_records(df, brands):
+    """转换为紧凑表示：分类列（品牌共享同一字典）、小整型、float32 份额"""
+    brand_dtype = pd.CategoricalDtype(sorted(set(brands) | set(df['brand'].unique())))
+    return df.astype({
+        'year': 'int16',
+        'event': pd.CategoricalDtype(sorted(df['event'].unique())),
+        'cohort': pd.CategoricalDtype(sorted(df['cohort'].unique())),
+        'brand': brand_dtype,
+        'brand_type': pd.CategoricalDtype(list(TYPE_ZH)),
+        'rank': 'int16',
+        'share': 'float32',
+        'share_pct': 'float32',
+        'type_zh': pd.CategoricalDtype(list(TYPE_ZH.values())),
+    })
+
+
+# 路径 -> (mtime_ns, size, 内容哈希)：文件未变时不必重新读取整个文件
+_DIGESTS = {}
+
+
+def file_digest(path):
+    """文件内容哈希（mtime 与大小未变时复用上次的结果）"""
+    stat = os.stat(path)
+    cached = _DIGESTS.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    _DIGESTS[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def fingerprint(json_path):
+    """数据版本指纹：实际读取的数据文件的格式 + 内容哈希（mtime 与大小未变时复用上次的哈希）"""
+    path, fmt = resolve_source(json_path)
+    if fmt == 'bundle':
+        path = os.path.join(path, BUNDLE_MANIFEST)
+    return f"{fmt}:{file_digest(path)}"
+
+
+def load_records(json_path, compact=False):
+    """加载记录表：列式文件存在且不旧于 JSON 时优先使用（Arrow IPC 以内存映射方式读取），否则回退到 JSON"""
+    path, fmt = resolve_source(json_path)
+    if fmt in ('arrow', 'bundle'):
+        df, extras = read_arrow(os.path.join(path, BUNDLE_RECORDS) if fmt == 'bundle' else path)
+    else:
+        records, extras = read_parquet(path) if fmt == 'parquet' else read_json(path)
+        df = prepare_records(records)
+    if compact:
+        df = compact_records(df, extras['brands'])
+    return df, extras
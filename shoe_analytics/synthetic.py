@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+合成数据集：与 marathon_shoe_data.json 同结构（records/brands/sources/metadata）的可复现大规模数据，按分区流式写出
+"""
+
+import json
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .storage import _EXTRAS_KEY, RECORD_SCHEMA, replace_file
+
+# 真实品牌放在最前面，应用中按名称引用的品牌（乔丹、特步与代表品牌）在合成数据中同样存在
+REAL_BRANDS = {
+    '特步': ('Xtep', 'domestic'),
+    '李宁': ('Li-Ning', 'domestic'),
+    '安踏': ('Anta', 'domestic'),
+    '鸿星尔克': ('Erke', 'domestic'),
+    '乔丹': ('Qiaodan', 'domestic'),
+    'Nike': ('Nike', 'international'),
+    'Adidas': ('Adidas', 'international'),
+    'ASICS': ('ASICS', 'international'),
+    'Saucony': ('Saucony', 'international'),
+    'HOKA': ('HOKA', 'international'),
+}
+REAL_EVENTS = ['厦门马拉松', '上海马拉松', '北京马拉松', '无锡马拉松', '广州马拉松']
+REAL_COHORTS = ['破3选手', '全局跑者']
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """合成数据集规模与随机种子"""
+    events: int = 200
+    years: int = 20
+    cohorts: int = 4
+    brands: int = 2000
+    # 每个 (队列, 赛事, 年份) 分区出现的品牌数范围
+    min_brands: int = 20
+    max_brands: int = 120
+    last_year: int = 2026
+    seed: int = 0
+
+    def event_names(self):
+        return (REAL_EVENTS + [f"赛事{i:04d}" for i in range(len(REAL_EVENTS), self.events)])[:self.events]
+
+    def cohort_names(self):
+        return (REAL_COHORTS + [f"队列{i:02d}" for i in range(len(REAL_COHORTS), self.cohorts)])[:self.cohorts]
+
+    def year_values(self):
+        return list(range(self.last_year - self.years + 1, self.last_year + 1))
+
+    def partitions(self):
+        """全部 (队列序号, 赛事序号, 年份序号)，即写出顺序"""
+        return [(ci, ei, yi) for ci in range(self.cohorts) for ei in range(self.events) for yi in range(self.years)]
+
+
+class _BrandModel:
+    """品牌的基础热度（长尾）、逐年趋势与队列偏好"""
+
+    def __init__(self, spec):
+        rng = np.random.default_rng((spec.seed, 0))
+        names, infos = [], []
+        for name, (name_en, brand_type) in list(REAL_BRANDS.items())[:spec.brands]:
+            names.append(name)
+            infos.append({'name_en': name_en, 'type': brand_type})
+        types = rng.choice(['domestic', 'international', 'other'], size=spec.brands, p=[0.5, 0.45, 0.05])
+        for i in range(len(names), spec.brands):
+            if types[i] == 'domestic':
+                names.append(f"国产品牌{i:04d}")
+                infos.append({'name_en': f"Domestic {i:04d}", 'type': 'domestic'})
+            elif types[i] == 'international':
+                names.append(f"Brand {i:04d}")
+                infos.append({'name_en': f"Brand {i:04d}", 'type': 'international'})
+            else:
+                names.append(f"其他{i:04d}")
+                infos.append({'name_en': f"Other {i:04d}", 'type': 'other'})
+        self.names = np.array(names, dtype=object)
+        self.types = np.array([info['type'] for info in infos], dtype=object)
+        self.info = dict(zip(names, infos))
+        # Zipf 型基础热度：名次越靠前的品牌份额越高
+        self.log_weight = -1.1 * np.log(np.arange(1, spec.brands + 1))
+        self.trend = rng.normal(0, 0.08, spec.brands)
+        self.cohort_bias = rng.normal(0, 0.4, (spec.cohorts, spec.brands))
+
+
+def _partition_rng(spec, ci, ei, yi):
+    # 每个分区独立的随机流：结果与生成顺序无关，可只生成部分分区
+    return np.random.default_rng((spec.seed, 1, ci, ei, yi))
+
+
+def _partition_size(spec, rng):
+    return int(rng.integers(min(spec.min_brands, spec.brands), min(spec.max_brands, spec.brands) + 1))
+
+
+def count_records(spec):
+    """总记录数（只抽取各分区的品牌数，不生成份额）"""
+    return sum(_partition_size(spec, _partition_rng(spec, *p)) for p in spec.partitions())
+
+
+def iter_partitions(spec, model=None):
+    """逐个分区生成记录，产出列字典；份额长尾分布、合计不超过 1，排名与份额降序一致"""
+    model = model or _BrandModel(spec)
+    events, cohorts, years = spec.event_names(), spec.cohort_names(), spec.year_values()
+    for ci, ei, yi in spec.partitions():
+        rng = _partition_rng(spec, ci, ei, yi)
+        k = _partition_size(spec, rng)
+        log_weight = model.log_weight + model.trend * yi + model.cohort_bias[ci] + rng.normal(0, 0.3, spec.brands)
+        weight = np.exp(log_weight - log_weight.max())
+        chosen = rng.choice(spec.brands, size=k, replace=False, p=weight / weight.sum())
+        raw = weight[chosen] * rng.lognormal(0, 0.5, k)
+        # 榜单覆盖 93%~98% 的份额，保留 4 位小数且至少 0.0001
+        share = np.maximum(np.floor(raw / raw.sum() * rng.uniform(0.93, 0.98) * 1e4) / 1e4, 1e-4)
+        order = np.argsort(-share, kind='stable')
+        chosen, share = chosen[order], share[order]
+        yield {
+            'year': [years[yi]] * k,
+            'event': [events[ei]] * k,
+            'cohort': [cohorts[ci]] * k,
+            'brand': model.names[chosen].tolist(),
+            'brand_type': model.types[chosen].tolist(),
+            'rank': list(range(1, k + 1)),
+            'share': share.tolist(),
+        }
+
+
+def _extras(spec, model, total_records):
+    events = spec.event_names()
+    return {
+        'brands': model.info,
+        'sources': [{
+            'source_id': 'synthetic',
+            'label': '合成数据（压测用）',
+            'detail': f"由 shoe_analytics.synthetic 生成，参数：{json.dumps(asdict(spec), ensure_ascii=False)}",
+            'date_collected': str(spec.last_year),
+            'events': events,
+        }],
+        'metadata': {
+            'total_records': total_records,
+            'events': events,
+            'cohorts': spec.cohort_names(),
+            'years': spec.year_values(),
+            'generated_at': f"synthetic(seed={spec.seed})",
+        },
+    }
+
+
+def write_synthetic_json(spec, path):
+    """流式写出 JSON 数据集（逐条写记录，内存占用只与单个分区相关），返回记录数"""
+    model = _BrandModel(spec)
+    columns = [field.name for field in RECORD_SCHEMA]
+    total = 0
+
+    def write(tmp):
+        nonlocal total
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('{\n  "records": [')
+            for part in iter_partitions(spec, model):
+                for row in zip(*(part[c] for c in columns)):
+                    f.write(',\n    ' if total else '\n    ')
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    total += 1
+            f.write('\n  ],\n')
+            extras = _extras(spec, model, total)
+            for i, key in enumerate(('brands', 'sources', 'metadata')):
+                f.write(f'  "{key}": {json.dumps(extras[key], ensure_ascii=False)}')
+                f.write(',\n' if i < 2 else '\n')
+            f.write('}\n')
+
+    replace_file(path, write)
+    return total
+
+
+def write_synthetic_parquet(spec, path, batch_rows=200_000):
+    """流式写出列式（Parquet）数据集，按批写入行组，返回记录数"""
+    model = _BrandModel(spec)
+    # 元数据写在 schema 中，需先得到总记录数
+    total = count_records(spec)
+    schema = RECORD_SCHEMA.with_metadata(
+        {_EXTRAS_KEY: json.dumps(_extras(spec, model, total), ensure_ascii=False).encode('utf-8')})
+    columns = [field.name for field in RECORD_SCHEMA]
+
+    def write(tmp):
+        batch = {c: [] for c in columns}
+        with pq.ParquetWriter(tmp, schema) as writer:
+            for part in iter_partitions(spec, model):
+                for c in columns:
+                    batch[c].extend(part[c])
+                if len(batch['year']) >= batch_rows:
+                    writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                    batch = {c: [] for c in columns}
+            if batch['year']:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+
+    replace_file(path, write)
+    return total
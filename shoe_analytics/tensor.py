@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+稠密张量：品牌 × 赛事 × 年份 × 队列，各单元保存条目数、份额和与排名统计，Tab 中的聚合改为沿轴归约
+"""
+
+import numpy as np
+import pandas as pd
+
+from .axes import category_codes, year_slice
+
+
+class ShareTensor:
+    """品牌 × 赛事 × 年份 × 队列 稠密张量，count == 0 的单元即缺失（mask 为 False）"""
+
+    def __init__(self, records):
+        self.brands = np.array(sorted(records['brand'].unique()), dtype=object)
+        self.events = list(pd.unique(records['event'].to_numpy()))
+        self.years = np.arange(int(records['year'].min()), int(records['year'].max()) + 1) if len(records) \
+            else np.arange(0)
+        self.cohorts = sorted(records['cohort'].unique())
+        first = records.drop_duplicates('brand').set_index('brand')
+        self.brand_type = np.array([first.at[b, 'brand_type'] for b in self.brands], dtype=object)
+        self.type_zh = np.array([first.at[b, 'type_zh'] for b in self.brands], dtype=object)
+
+        self._event_pos = {e: i for i, e in enumerate(self.events)}
+        self._cohort_pos = {c: i for i, c in enumerate(self.cohorts)}
+
+        shape = (len(self.brands), len(self.events), len(self.years), len(self.cohorts))
+        cell = (
+            category_codes(records['brand'], self.brands),
+            category_codes(records['event'], self.events),
+            records['year'].to_numpy(dtype=np.int64) - (self.years[0] if len(self.years) else 0),
+            category_codes(records['cohort'], self.cohorts),
+        )
+        rank = records['rank'].to_numpy(dtype=np.float64)
+
+        self.count = np.zeros(shape, dtype=np.int32)
+        self.share = np.zeros(shape)
+        self.share_pct = np.zeros(shape)
+        self.rank_sum = np.zeros(shape)
+        self.rank_sq = np.zeros(shape)
+        self.rank_min = np.full(shape, np.inf)
+        np.add.at(self.count, cell, 1)
+        np.add.at(self.share, cell, records['share'].to_numpy(dtype=np.float64))
+        np.add.at(self.share_pct, cell, records['share_pct'].to_numpy(dtype=np.float64))
+        np.add.at(self.rank_sum, cell, rank)
+        np.add.at(self.rank_sq, cell, rank ** 2)
+        np.minimum.at(self.rank_min, cell, rank)
+
+    @property
+    def mask(self):
+        return self.count > 0
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.count, self.share, self.share_pct, self.rank_sum, self.rank_sq, self.rank_min))
+
+    def _cut(self, events, year_range, cohort):
+        """返回按筛选条件截取 (品牌, 赛事子集, 年份区间) 的函数及对应年份"""
+        event_idx = sorted(self._event_pos[e] for e in events if e in self._event_pos)
+        if cohort not in self._cohort_pos or not event_idx or not len(self.years):
+            return None, self.years[:0]
+        years = year_slice(self.years, year_range)
+        ci = self._cohort_pos[cohort]
+        return (lambda a: a[:, :, years, ci][:, event_idx]), self.years[years]
+
+    def type_sums(self, events, year_range, cohort):
+        """国产/国际品牌每年份额合计：沿赛事轴与同类品牌归约"""
+        cut, years = self._cut(events, year_range, cohort)
+        columns = ['year', 'brand_type', 'type_zh', 'share', 'share_pct']
+        if cut is None:
+            return pd.DataFrame(columns=columns)
+        share = cut(self.share).sum(axis=1)
+        count = cut(self.count).sum(axis=1)
+        rows = []
+        for brand_type in ('domestic', 'international'):
+            in_type = self.brand_type == brand_type
+            if not in_type.any():
+                continue
+            type_share = share[in_type].sum(axis=0)
+            present = count[in_type].sum(axis=0) > 0
+            rows.append(pd.DataFrame({
+                'year': years[present],
+                'brand_type': brand_type,
+                'type_zh': self.type_zh[in_type][0],
+                'share': type_share[present],
+            }))
+        trend = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=columns[:-1])
+        trend = trend.sort_values(['year', 'brand_type'], kind='stable').reset_index(drop=True)
+        trend['share_pct'] = trend['share'] * 100
+        return trend
+
+    def heatmap(self, brand, events, year_range, cohort):
+        """单个品牌 赛事 × 年份 的平均排名矩阵（等价于 pivot_table(index='event', columns='year')）"""
+        cut, years = self._cut(events, year_range, cohort)
+        matches = np.flatnonzero(self.brands == brand)
+        if cut is None or not len(matches):
+            return pd.DataFrame()
+        bi = matches[0]
+        event_idx = sorted(self._event_pos[e] for e in events if e in self._event_pos)
+        count = cut(self.count)[bi]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, cut(self.rank_sum)[bi] / count, np.nan)
+        pivot = pd.DataFrame(mean, index=[self.events[i] for i in event_idx], columns=years)
+        pivot.index.name, pivot.columns.name = 'event', 'year'
+        return pivot.dropna(how='all').dropna(axis=1, how='all').sort_index()
+
+    def brand_stats(self, events, year_range, cohort):
+        """各品牌在筛选范围内的排名/份额统计，一次归约得到全部品牌"""
+        cut, _ = self._cut(events, year_range, cohort)
+        columns = ['rank_mean', 'share_pct_mean', 'rank_min', 'rank_std', 'event_count']
+        if cut is None:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name='brand'))
+        count = cut(self.count)
+        n = count.sum(axis=(1, 2))
+        present = n > 0
+        n = n[present]
+        rank_sum = cut(self.rank_sum).sum(axis=(1, 2))[present]
+        rank_sq = cut(self.rank_sq).sum(axis=(1, 2))[present]
+        rank_mean = rank_sum / n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rank_var = np.where(n > 1, np.maximum(rank_sq - n * rank_mean ** 2, 0) / (n - 1), np.nan)
+        return pd.DataFrame({
+            'rank_mean': rank_mean,
+            'share_pct_mean': cut(self.share_pct).sum(axis=(1, 2))[present] / n,
+            'rank_min': cut(self.rank_min).min(axis=(1, 2), initial=np.inf)[present],
+            'rank_std': np.sqrt(rank_var),
+            'event_count': (count.sum(axis=2) > 0).sum(axis=1)[present],
+        }, index=pd.Index(self.brands[present], name='brand'))
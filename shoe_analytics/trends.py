@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+国产/国际趋势序列：每个 (数据版本, 队列) 物化一次 (年份, 赛事) 粒度的类型份额和、TOP10 条目数与代表品牌排名，
+Tab4 的各项指标只需按所选赛事与年份切片相加，不再扫描原始记录
+"""
+
+import functools
+import operator
+
+import numpy as np
+import pandas as pd
+
+from .axes import category_codes, year_slice
+from .storage import TYPE_ZH
+
+# Tab4 中的代表品牌
+DOMESTIC_LEADERS = ['特步', '李宁', '安踏', '鸿星尔克', '乔丹']
+INTERNATIONAL_LEADERS = ['Nike', 'Adidas', 'ASICS', 'Saucony', 'HOKA']
+
+BRAND_TYPES = ['domestic', 'international']
+TOP10_TYPES = sorted(TYPE_ZH[t] for t in BRAND_TYPES)
+
+
+class TypeSeries:
+    """某一队列的 (年份, 赛事) × 类型 份额和/条目数/TOP10 条目数，以及代表品牌 (年份, 赛事) 的排名和/条目数"""
+
+    def __init__(self, dataset, cohort, leaders=DOMESTIC_LEADERS + INTERNATIONAL_LEADERS):
+        cube = dataset.cube
+        self.cohort = cohort
+        self.events = list(cube.events)
+        self.years = cube.years
+        self.leaders = sorted(leaders)
+        self._event_pos = {e: i for i, e in enumerate(self.events)}
+        records = dataset.select(self.events, (int(self.years[0]), int(self.years[-1])), cohort) if len(self.years) \
+            else dataset.records.iloc[0:0]
+
+        year = records['year'].to_numpy(dtype=np.int64) - (self.years[0] if len(self.years) else 0)
+        event = category_codes(records['event'], self.events)
+        shape = (len(self.years), len(self.events))
+
+        brand_type = category_codes(records['brand_type'], BRAND_TYPES)
+        typed = brand_type >= 0
+        cell = (year[typed], event[typed], brand_type[typed])
+        self.share = np.zeros(shape + (len(BRAND_TYPES),))
+        # 合计按记录的份额类型输出（紧凑模式为 float32），与分组求和的结果类型一致
+        self.share_dtype = records['share'].to_numpy().dtype
+        self.count = np.zeros(shape + (len(BRAND_TYPES),), dtype=np.int32)
+        # 单元内按行序做补偿求和（与 pandas 分组求和相同），单元间相加见 _compensated_sum
+        cell_sums = pd.Series(records['share'].to_numpy(dtype=np.float64)[typed]).groupby(list(cell)).sum()
+        self.share[tuple(cell_sums.index.get_level_values(i) for i in range(3))] = cell_sums.to_numpy()
+        np.add.at(self.count, cell, 1)
+
+        top_type = category_codes(records['type_zh'], TOP10_TYPES)
+        top = (top_type >= 0) & (records['rank'].to_numpy() <= 10)
+        self.top10 = np.zeros(shape + (len(TOP10_TYPES),), dtype=np.int32)
+        np.add.at(self.top10, (year[top], event[top], top_type[top]), 1)
+        # 沿年份轴的前缀和（首行为 0），年份区间内的 TOP10 合计为两行相减
+        self.cum_top10 = np.pad(self.top10.astype(np.int64), ((1, 0), (0, 0), (0, 0))).cumsum(axis=0)
+        # 每个 (类型, 赛事) 有 TOP10 条目的年份位掩码（第 y 位为第 y 年）：赛事子集取并集后与区间掩码相与再数位数
+        self.top10_years = [[0] * len(self.events) for _ in TOP10_TYPES]
+        for yi, ei, ti in zip(*np.nonzero(self.top10)):
+            self.top10_years[ti][ei] |= 1 << int(yi)
+
+        leader = category_codes(records['brand'], self.leaders)
+        led = leader >= 0
+        cell = (year[led], event[led], leader[led])
+        self.rank_sum = np.zeros(shape + (len(self.leaders),))
+        self.rank_count = np.zeros(shape + (len(self.leaders),), dtype=np.int32)
+        np.add.at(self.rank_sum, cell, records['rank'].to_numpy(dtype=np.float64)[led])
+        np.add.at(self.rank_count, cell, 1)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.share, self.count, self.top10, self.cum_top10, self.rank_sum, self.rank_count))
+
+    def _slice(self, events, year_range):
+        # 年份区间取连续切片，赛事子集取对应列后沿赛事轴相加
+        event_idx = sorted(self._event_pos[e] for e in events if e in self._event_pos)
+        return year_slice(self.years, year_range), event_idx
+
+    def _sum(self, array, events, year_range):
+        years, event_idx = self._slice(events, year_range)
+        return self.years[years], array[years][:, event_idx].sum(axis=1)
+
+    def _compensated_sum(self, events, year_range):
+        # 份额和沿赛事轴做 Kahan 补偿相加并跳过空单元，与对原始记录分组求和的差异在末位
+        years, event_idx = self._slice(events, year_range)
+        total = np.zeros((years.stop - years.start, len(BRAND_TYPES)))
+        compensation = np.zeros_like(total)
+        for ei in event_idx:
+            present = self.count[years, ei] > 0
+            y = self.share[years, ei] - compensation
+            t = total + y
+            compensation = np.where(present, (t - total) - y, compensation)
+            total = np.where(present, t, total)
+        return total
+
+    def type_trend(self, events, year_range):
+        """国产/国际品牌每年份额合计（与对筛选结果 groupby(['year', 'brand_type', 'type_zh']) 求和只差末位）"""
+        years, count = self._sum(self.count, events, year_range)
+        share = self._compensated_sum(events, year_range)
+        yi, ti = np.nonzero(count)
+        trend = pd.DataFrame({
+            'year': years[yi],
+            'brand_type': np.array(BRAND_TYPES, dtype=object)[ti],
+            'type_zh': np.array([TYPE_ZH[t] for t in BRAND_TYPES], dtype=object)[ti],
+            'share': share[yi, ti].astype(self.share_dtype),
+        })
+        trend['share_pct'] = trend['share'] * 100
+        return trend
+
+    def top10_by_type(self, events, year_range):
+        """国产/国际品牌每年进入 TOP10 的条目数"""
+        years, top10 = self._sum(self.top10, events, year_range)
+        yi, ti = np.nonzero(top10)
+        return pd.DataFrame({
+            'year': years[yi],
+            'type_zh': np.array(TOP10_TYPES, dtype=object)[ti],
+            'count': top10[yi, ti].astype(np.int64),
+        })
+
+    def top10_totals(self, events, year_range):
+        """国产/国际品牌在年份区间内进入 TOP10 的条目总数与有条目的年数（以类型为索引）"""
+        years, event_idx = self._slice(events, year_range)
+        totals = (self.cum_top10[years.stop] - self.cum_top10[years.start])[event_idx].sum(axis=0)
+        window = ((1 << (years.stop - years.start)) - 1) << years.start
+        active = [functools.reduce(operator.or_, (masks[ei] for ei in event_idx), 0) & window
+                  for masks in self.top10_years]
+        active = [mask.bit_count() for mask in active]
+        return pd.DataFrame({'count': totals, 'years': active}, index=pd.Index(TOP10_TYPES, name='type_zh'))
+
+    def covers(self, brands):
+        return all(brand in self.leaders for brand in brands)
+
+    def brand_rank_trend(self, brands, events, year_range):
+        """代表品牌每年的平均排名（brands 须均为代表品牌）"""
+        years, rank_sum = self._sum(self.rank_sum, events, year_range)
+        _, rank_count = self._sum(self.rank_count, events, year_range)
+        columns = [self.leaders.index(b) for b in sorted(set(brands))]
+        rank_sum, rank_count = rank_sum[:, columns], rank_count[:, columns]
+        yi, bi = np.nonzero(rank_count)
+        return pd.DataFrame({
+            'year': years[yi],
+            'brand': np.array(self.leaders, dtype=object)[columns][bi],
+            'rank': rank_sum[yi, bi] / rank_count[yi, bi],
+        })
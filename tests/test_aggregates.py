@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+聚合结构与逐行分组计算的一致性：在小规模合成数据集上穷举全部侧边栏筛选状态，比较聚合立方体（含年份前缀和）、
+稠密张量与趋势序列的结果和对筛选结果直接 groupby 的结果（默认与紧凑两种内存表示）
+
+用法：python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from shoe_analytics import FilterState, SyntheticSpec, TypeSeries, open_dataset, write_synthetic_json  # noqa: E402
+from shoe_analytics.metrics import brand_stats  # noqa: E402
+from shoe_analytics.precompute import iter_states  # noqa: E402
+from shoe_analytics.trends import DOMESTIC_LEADERS, INTERNATIONAL_LEADERS, TOP10_TYPES  # noqa: E402
+
+# 5 场赛事 × 6 年 × 2 个队列：1302 个筛选状态
+SPEC = SyntheticSpec(events=5, years=6, cohorts=2, brands=40, min_brands=8, max_brands=25, seed=7)
+
+
+def setUpModule():
+    global _tmp, DATA_PATH
+    _tmp = tempfile.TemporaryDirectory()
+    DATA_PATH = os.path.join(_tmp.name, 'synthetic.json')
+    write_synthetic_json(SPEC, DATA_PATH)
+
+
+def tearDownModule():
+    _tmp.cleanup()
+
+
+def _plain(df):
+    # 分类列转为字符串对象列、索引重置，只比较取值
+    df = df.reset_index(drop=True)
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+class _Aggregates:
+    """各聚合结构与 groupby 的比较；子类指定内存表示与浮点容差"""
+    compact = False
+    rtol = 1e-12
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = open_dataset(DATA_PATH, compact=cls.compact, tensor=True)
+        cls.states = list(iter_states(cls.dataset.options))
+        cls.series = {cohort: TypeSeries(cls.dataset, cohort) for cohort in cls.dataset.options['cohorts']}
+
+    def frame(self, state):
+        # 不经分区索引，直接对记录表做布尔筛选
+        records = self.dataset.records
+        keep = records['event'].isin(state.events) & records['year'].between(*state.year_range) \
+            & (records['cohort'] == state.cohort)
+        return records[keep.to_numpy()]
+
+    def assert_same(self, expected, actual, msg):
+        assert_frame_equal(_plain(expected), _plain(actual), check_dtype=False, check_exact=False,
+                           rtol=self.rtol, atol=0, obj=str(msg))
+
+    def check_cube(self, state, df):
+        cube = self.dataset.cube
+        means = df.groupby(['year', 'brand'], observed=True).agg(
+            type_zh=('type_zh', 'first'), share=('share', 'mean'), share_pct=('share_pct', 'mean')).reset_index()
+        self.assert_same(means, cube.event_subset_means(*self.args(state)), state)
+        # 区间均值：多个年份走前缀和相减，单一年份直接取单元
+        ranged = df.groupby('brand', observed=True).agg(type_zh=('type_zh', 'first'), share_pct=('share_pct', 'mean'))
+        self.assert_same(ranged.reset_index(), cube.range_means(*self.args(state)), state)
+
+    def type_trend(self, df):
+        # 只统计国产/国际品牌（合成数据中另有少量其他类型品牌）
+        trend = df.groupby(['year', 'brand_type', 'type_zh'], observed=True)['share'].sum().reset_index()
+        trend = trend[trend['brand_type'].isin(['domestic', 'international'])]
+        trend['share_pct'] = trend['share'] * 100
+        return trend
+
+    def check_tensor(self, state, df):
+        tensor = self.dataset.tensor
+        self.assert_same(self.type_trend(df), tensor.type_sums(*self.args(state)), state)
+        stats = brand_stats(df)
+        actual = tensor.brand_stats(*self.args(state))
+        self.assertEqual(list(stats.index.astype(str)), list(actual.index), state)
+        self.assert_same(stats, actual, state)
+        for brand in df['brand'].astype(str).unique()[:3]:
+            pivot = df[df['brand'] == brand].pivot_table(values='rank', index='event', columns='year',
+                                                         aggfunc='mean', observed=True)
+            heatmap = tensor.heatmap(brand, *self.args(state))
+            self.assertEqual(list(pivot.index.astype(str)), list(heatmap.index), state)
+            self.assertEqual(list(pivot.columns), list(heatmap.columns), state)
+            np.testing.assert_allclose(pivot.to_numpy(dtype=float), heatmap.to_numpy(dtype=float), rtol=self.rtol)
+
+    def check_series(self, state, df):
+        series = self.series[state.cohort]
+        events, year_range = state.events, state.year_range
+        self.assert_same(self.type_trend(df), series.type_trend(events, year_range), state)
+        top10 = df[df['rank'] <= 10].groupby(['year', 'type_zh'], observed=True).size().reset_index(name='count')
+        top10 = top10[top10['type_zh'].isin(TOP10_TYPES)]
+        self.assert_same(top10, series.top10_by_type(events, year_range), state)
+        totals = top10.groupby('type_zh')['count'].agg(count='sum', years='size')
+        totals = totals.reindex(series.top10_totals(events, year_range).index, fill_value=0)
+        self.assert_same(totals, series.top10_totals(events, year_range), state)
+        for leaders in (DOMESTIC_LEADERS, INTERNATIONAL_LEADERS):
+            ranks = df[df['brand'].isin(leaders)].groupby(['year', 'brand'], observed=True)['rank'].mean()
+            self.assert_same(ranks.reset_index(), series.brand_rank_trend(leaders, events, year_range), state)
+
+    def args(self, state):
+        return state.events, state.year_range, state.cohort
+
+    def check_all(self, state):
+        df = self.frame(state)
+        self.check_cube(state, df)
+        self.check_tensor(state, df)
+        self.check_series(state, df)
+
+    def test_every_sidebar_state(self):
+        for state in self.states:
+            self.check_all(state)
+
+    def test_single_year_range(self):
+        # 单一年份的区间直接取单元，不经年份前缀和
+        years = self.dataset.options['years']
+        for year in range(years[0], years[1] + 1):
+            state = FilterState(tuple(sorted(self.dataset.options['events'])), (year, year),
+                                self.dataset.options['cohorts'][0])
+            self.check_all(state)
+            self.assertTrue(len(self.frame(state)))
+
+    def test_empty_selection(self):
+        cohort = self.dataset.options['cohorts'][0]
+        years = tuple(self.dataset.options['years'])
+        cube, tensor, series = self.dataset.cube, self.dataset.tensor, self.series[cohort]
+        for events, year_range, cohort in (((), years, cohort), (('不存在的赛事',), years, cohort),
+                                           (tuple(self.dataset.options['events']), years, '不存在的队列'),
+                                           (tuple(self.dataset.options['events']), (1900, 1901), cohort)):
+            self.assertTrue(cube.event_subset_means(events, year_range, cohort).empty)
+            self.assertTrue(cube.range_means(events, year_range, cohort).empty)
+            self.assertTrue(tensor.type_sums(events, year_range, cohort).empty)
+            self.assertTrue(tensor.brand_stats(events, year_range, cohort).empty)
+            self.assertTrue(tensor.heatmap('乔丹', events, year_range, cohort).empty)
+        for events, year_range in (((), years), (tuple(self.dataset.options['events']), (1900, 1901))):
+            self.assertTrue(series.type_trend(events, year_range).empty)
+            self.assertTrue(series.top10_by_type(events, year_range).empty)
+            self.assertEqual(series.top10_totals(events, year_range)[['count', 'years']].to_numpy().sum(), 0)
+            self.assertTrue(series.brand_rank_trend(DOMESTIC_LEADERS, events, year_range).empty)
+
+
+class DefaultModeTest(_Aggregates, unittest.TestCase):
+    pass
+
+
+class CompactModeTest(_Aggregates, unittest.TestCase):
+    # 紧凑模式的份额为 float32，逐行分组按 float32 输出
+    compact = True
+    rtol = 1e-6
+
+
+if __name__ == '__main__':
+    unittest.main()